@@ -0,0 +1,121 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import maze
+
+FIELDS = [
+    "maze", "algorithm", "status", "explored", "path_length",
+    "suboptimality", "seconds", "image", "error",
+]
+
+
+def run(filename, algorithm, images, max_nodes, timeout):
+    """Solves one maze with one algorithm and returns a row of results."""
+
+    try:
+        m = maze.Maze(filename, maze.ALGORITHMS[algorithm])
+        result = m.find_path(max_nodes=max_nodes, timeout=timeout)
+    except Exception as error:
+        # e.g. a missing file or a maze without a goal, which shouldn't stop
+        # the rest of the batch
+        return {
+            "maze": filename,
+            "algorithm": algorithm,
+            "status": "error",
+            "explored": None,
+            "path_length": None,
+            "suboptimality": None,
+            "seconds": None,
+            "image": None,
+            "error": str(error),
+        }
+
+    image = None
+    if images != None and result.solved:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        image = os.path.join(images, f"{name}_{algorithm}.png")
+        m.output_image(image, show_explored=True)
+
+    return {
+        "maze": filename,
+        "algorithm": algorithm,
+        "status": result.status,
+        "explored": result.num_explored,
+        # an anytime search that was stopped may still have found a path
+        "path_length": len(result.path) if result.path != None else None,
+        "suboptimality": result.suboptimality,
+        "seconds": result.timings["solve"],
+        "image": image,
+        "error": None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve many mazes with many algorithms in parallel."
+    )
+    parser.add_argument("mazes", nargs="+", help="maze files to solve")
+    parser.add_argument(
+        "-a", "--algorithms", nargs="+", choices=maze.ALGORITHMS,
+        default=list(maze.ALGORITHMS), help="algorithms to run (default: all)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "-f", "--format", choices=["json", "csv"], default="json",
+        help="one JSON object per line, or CSV with a header"
+    )
+    parser.add_argument(
+        "-o", "--output", default=None, help="file to write (default: stdout)"
+    )
+    parser.add_argument(
+        "--images", default=None, help="directory to render solutions into"
+    )
+    parser.add_argument(
+        "--max-nodes", type=int, default=None,
+        help="give up on a run after exploring this many states"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None,
+        help="give up on a run after this many seconds"
+    )
+    args = parser.parse_args()
+
+    if args.images != None:
+        os.makedirs(args.images, exist_ok=True)
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    if args.format == "csv":
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [
+            executor.submit(run, filename, algorithm, args.images,
+                            args.max_nodes, args.timeout)
+            for filename in args.mazes
+            for algorithm in args.algorithms
+        ]
+
+        # rows are written in the order of the runs, as they complete
+        for future in futures:
+            row = future.result()
+            if args.format == "csv":
+                writer.writerow(row)
+            else:
+                output.write(json.dumps(row) + "\n")
+
+            output.flush()
+
+    if output is not sys.stdout:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
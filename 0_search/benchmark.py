@@ -0,0 +1,175 @@
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import maze
+from maze import generate
+from maze.index import distances_from
+
+
+def measure(filename, algorithm, memory):
+    """
+    Solves a maze once and returns (seconds, peak bytes, maze). Only the
+    search is timed, not parsing the file, but the peak memory includes
+    the parsed maze.
+    """
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+
+    m = maze.Maze(filename, maze.ALGORITHMS[algorithm])
+    seconds = m.find_path().timings["solve"]
+
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return seconds, peak, m
+
+
+def run(kinds, sizes, algorithms, seed, repeat, memory):
+    """Yields one result per generated maze and algorithm."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in kinds:
+            name, _, density = kind.partition(":")
+            for cells in sizes:
+                side = max(3, math.isqrt(cells))
+                if density:
+                    rows = generate.random_walls(side, side, seed, float(density))
+                else:
+                    rows = generate.GENERATORS[name](side, side, seed)
+
+                filename = os.path.join(directory, f"{name}.txt")
+                generate.write(rows, filename)
+
+                # shortest path length, to check the others against
+                reference = maze.Maze(filename, maze.QueueFrontier)
+                shortest = distances_from(
+                    reference.grid, reference.grid.cell(*reference.start)
+                )[reference.grid.cell(*reference.goal)]
+                if shortest == -1:
+                    shortest = None
+
+                for algorithm in algorithms:
+                    # timings are taken without tracemalloc, which slows
+                    # everything down, and memory in a separate run
+                    seconds = []
+                    for _ in range(repeat):
+                        elapsed, _, m = measure(filename, algorithm, False)
+                        seconds.append(elapsed)
+
+                    peak = None
+                    if memory:
+                        peak = measure(filename, algorithm, True)[1]
+
+                    length = None
+                    if m.solution != None:
+                        length = len(m.solution["path"])
+
+                    # whether the path is a shortest one, unknown if there's
+                    # no path at all
+                    optimal = None
+                    if shortest != None:
+                        optimal = length == shortest
+
+                    yield {
+                        "kind": kind,
+                        "cells": side * side,
+                        "seed": seed,
+                        "algorithm": algorithm,
+                        "seconds": min(seconds),
+                        "peak_bytes": peak,
+                        "explored": m.num_explored,
+                        "path_length": length,
+                        "shortest": shortest,
+                        "optimal": optimal,
+                    }
+
+
+def compare(old, new):
+    """Prints how much faster or slower each run got since an old report."""
+
+    def key(result):
+        return (result["kind"], result["cells"], result["seed"],
+                result["algorithm"])
+
+    before = {key(result): result for result in old["results"]}
+    for result in new["results"]:
+        if key(result) in before:
+            ratio = result["seconds"] / max(before[key(result)]["seconds"], 1e-9)
+            print(*key(result), f"{ratio:.2f}x", sep="\t", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the search algorithms on generated mazes."
+    )
+    parser.add_argument(
+        "-k", "--kinds", nargs="+",
+        default=["perfect", "rooms", "spiral",
+                 "random:0.1", "random:0.2", "random:0.3"],
+        help="maze generators, random:<density> for random walls"
+    )
+    parser.add_argument(
+        "-s", "--sizes", nargs="+", type=int, default=[10 ** 2, 10 ** 3, 10 ** 4],
+        help="approximate number of cells of each maze (up to 10 ** 7)"
+    )
+    parser.add_argument(
+        "-a", "--algorithms", nargs="+", choices=maze.ALGORITHMS,
+        default=list(maze.ALGORITHMS), help="algorithms to run (default: all)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3,
+        help="timed runs per maze, the fastest one is kept"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the peak memory runs"
+    )
+    parser.add_argument(
+        "-o", "--output", default=None, help="JSON report (default: stdout)"
+    )
+    parser.add_argument(
+        "--compare", default=None, help="earlier JSON report to compare with"
+    )
+    args = parser.parse_args()
+
+    for kind in args.kinds:
+        name, _, density = kind.partition(":")
+        if name not in generate.GENERATORS or (density and name != "random"):
+            parser.error(f"unknown maze kind: {kind}")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": [],
+    }
+    for result in run(args.kinds, args.sizes, args.algorithms, args.seed,
+                      args.repeat, not args.no_memory):
+        report["results"].append(result)
+        print(result["kind"], result["cells"], result["algorithm"],
+              f"{result['seconds']:.4f}s", sep="\t", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
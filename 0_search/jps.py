@@ -0,0 +1,22 @@
+import sys
+import maze
+
+if len(sys.argv) != 2:
+    sys.exit("Usage: python jps.py maze.txt")
+
+m = maze.Maze(sys.argv[1], maze.JumpPointSearch)
+print("Maze:")
+m.print()
+print("Solving...\n")
+m.solve()
+print("Solution:")
+m.print()
+print("States explored:", m.num_explored)
+
+# A* finds a path of the same length, but has to expand far more states
+a_star = maze.Maze(sys.argv[1], maze.ManhattanCostFrontier)
+a_star.solve()
+print("States explored by A*:", a_star.num_explored)
+
+print("Path:", m.solution["actions"])
+m.output_image("images/jps.png", show_explored=True)
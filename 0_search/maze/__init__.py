@@ -1,12 +1,47 @@
-import math
+from collections import deque
+from contextlib import nullcontext
+import heapq
 from PIL import Image, ImageDraw
 import sys
+import time
+
+from .bidirectional import BidirectionalAStar, BidirectionalBFS
+from .grid import ACTIONS, MOVES, Bitset, CellSet, Grid, WallRows
+from .index import MazeIndex
+from .instruments import Instruments
+from .jps import JumpPointSearch
+from .loader import load_grid
+from .replan import Replanner
+from .result import Budget, NoSolution, Result, SearchStopped
+from .weighted import AnytimeRepairingAStar, Dijkstra, WeightedAStar
+
+
+# palette indices of the cells in output_image()
+EMPTY, WALL, EXPLORED, EXPLORED_WALL, PATH, START, GOAL, BORDER = range(8)
+
+PALETTE = [
+    237, 240, 252,  # empty cells
+    40, 40, 40,  # walls
+    212, 97, 85,  # explored nodes
+    40, 40, 40,  # walls, if marked as explored
+    220, 235, 113,  # solution path
+    255, 0, 0,  # starting position
+    0, 171, 28,  # goal position
+    0, 0, 0,  # cell borders
+]
+
+
+# characters of open cells and walls in Maze.print()
+CHARS = {0: " ", 1: "█"}
 
 
 class Node:
+    # no per-node __dict__, as a search may hold millions of nodes at once
+    __slots__ = ("state", "parent", "action", "cost")
+
     def __init__(self, state, parent, action, cost=0):
         self.state = state  # state of this node (coordinates here)
-        self.parent = parent  # reference to parent node
+        self.parent = parent  # reference to parent node, if it is kept
         self.action = action  # action taken to reach this state
         self.cost = cost  # cost incurred to reach this state
 
@@ -17,24 +52,34 @@ class StackFrontier:
     """
 
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}  # state -> number of its nodes in the frontier
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def is_empty(self):
         return len(self.frontier) == 0
 
+    def discard(self, node):
+        # keep the state index in sync with the removed node
+        count = self.states[node.state] - 1
+        if count == 0:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count
+
+        return node
+
     def remove(self):
         if self.is_empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+            return self.discard(self.frontier.pop())
 
 
 class QueueFrontier(StackFrontier):
@@ -46,9 +91,7 @@ class QueueFrontier(StackFrontier):
         if self.is_empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+            return self.discard(self.frontier.popleft())
 
 
 def manhattan_distance(x1, y1, x2, y2):
@@ -58,32 +101,71 @@ def manhattan_distance(x1, y1, x2, y2):
 class ManhattanFrontier(StackFrontier):
     """
     For Greedy Best-First Search algorithm.
+
+    The frontier is a binary heap keyed on (is not goal, distance, insertion
+    order), so the goal is always removed first and ties are broken in the
+    order the nodes were added. Nodes that get replaced by a later add() for
+    the same state are deleted lazily when they reach the top of the heap.
     """
 
+    def __init__(self):
+        self.frontier = []  # heap of [key, order, node] entries
+        self.entries = {}  # state -> live heap entry of that state
+        self.counter = 0  # insertion order, used for tie-breaking
+        self._goal = None
+
     @staticmethod
     def calc_distance(node, goal):
         return manhattan_distance(
             node.state[0], node.state[1], goal[0], goal[1]
         )
 
+    @property
+    def goal(self):
+        return self._goal
+
+    @goal.setter
+    def goal(self, goal):
+        # priorities depend on the goal, so re-key whatever is already queued
+        self._goal = goal
+        for entry in self.frontier:
+            if entry[2] is not None:
+                entry[0] = self.key(entry[2])
+
+        heapq.heapify(self.frontier)
+
+    def key(self, node):
+        if self._goal is None:
+            return (True, 0)
+
+        return (node.state != self._goal, self.calc_distance(node, self._goal))
+
+    def add(self, node):
+        old = self.entries.get(node.state)
+        if old is not None:
+            old[2] = None  # mark as deleted, skipped when popped
+
+        entry = [self.key(node), self.counter, node]
+        self.counter += 1
+        self.entries[node.state] = entry
+        heapq.heappush(self.frontier, entry)
+
+    def contains_state(self, state):
+        return state in self.entries
+
+    def is_empty(self):
+        return len(self.entries) == 0
+
     def remove(self):
         if self.is_empty():
             raise Exception("empty frontier")
         else:
             # remove the node that is estimated to be the closest to the goal
-            min = math.inf
-            for node in self.frontier:
-                if node.state == self.goal:
-                    self.frontier.remove(node)
+            while True:
+                node = heapq.heappop(self.frontier)[2]
+                if node is not None:
+                    del self.entries[node.state]
                     return node
-                else:
-                    dist = self.calc_distance(node, self.goal)
-                    if dist < min:
-                        min = dist
-                        min_node = node
-
-            self.frontier.remove(min_node)
-            return min_node
 
 
 class ManhattanCostFrontier(ManhattanFrontier):
@@ -99,115 +181,237 @@ class ManhattanCostFrontier(ManhattanFrontier):
         )
 
 
+# frontiers of the search algorithms, by the name of their script
+ALGORITHMS = {
+    "a_star": ManhattanCostFrontier,
+    "bfs": QueueFrontier,
+    "dfs": StackFrontier,
+    "gbf": ManhattanFrontier,
+    "bidirectional_bfs": BidirectionalBFS,
+    "bidirectional_a_star": BidirectionalAStar,
+    "jps": JumpPointSearch,
+    "dijkstra": Dijkstra,
+    "weighted_a_star": WeightedAStar,
+    "ara_star": AnytimeRepairingAStar,
+}
+
+
 class Maze:
-    def __init__(self, filename, Frontier):
-        with open(filename) as file:
-            contents = file.read()
-
-        # validation of starting and goal positions
-        if contents.count("A") != 1:
-            raise Exception("maze must have exactly one starting point")
-        elif contents.count("B") != 1:
-            raise Exception("maze muse have exactly one goal")
-
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
+    def __init__(self, filename, Frontier, instruments=None):
+        # optional counters and timers, see Instruments
+        self.instruments = instruments
+
+        # the file is parsed row by row into the grid, validating the
+        # starting and goal positions on the way
+        with self.timer("parse"):
+            self.grid, self.start, self.goal = load_grid(filename)
+
+        self.height = self.grid.height
+        self.width = self.grid.width
         self.Frontier = Frontier
         self.solution = None
 
-        self.walls = []
-        for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                try:
-                    if contents[y][x] == "A":
-                        self.start = (x, y)
-                        row.append(False)
-                    elif contents[y][x] == "B":
-                        self.goal = (x, y)
-                        row.append(False)
-                    elif contents[y][x] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-
-            self.walls.append(row)
-
-    def print(self):
-        for y, row in enumerate(self.walls):
-            for x, is_wall in enumerate(row):
-                if is_wall:
-                    print("█", end="")
-                elif (x, y) == self.start:
-                    print("A", end="")
-                elif (x, y) == self.goal:
-                    print("B", end="")
-                elif self.solution != None and (x, y) in self.solution["path"]:
-                    print("+", end="")
-                else:
-                    print(" ", end="")
-
-            print()
-
-        print()
+        # bound on how much costlier than the cheapest path the solution may
+        # be, set by the anytime searches
+        self.suboptimality = None
+
+        # limits of the search in progress, set by find_path()
+        self.budget = None
+
+    @property
+    def walls(self):
+        """
+        Rows of booleans telling which cells are walls. This is a read-only
+        view of self.grid, which is built in constant time; assigning to it
+        raises, use self.grid.set_wall() to change a wall.
+        """
+
+        return WallRows(self.grid)
+
+    def print(self, crop=None, step=1):
+        """
+        Prints the maze with a single write. crop is an optional (left, top,
+        right, bottom) box of cells to print, and step > 1 downsamples it to
+        one character per step x step block of cells.
+        """
+
+        if crop == None:
+            crop = (0, 0, self.width, self.height)
+
+        left, top, right, bottom = crop
+
+        # characters that go over the walls, by row and column of the output
+        marks = {}
+
+        def mark(state, char):
+            x, y = state
+            if left <= x < right and top <= y < bottom:
+                row = marks.setdefault((y - top) // step, {})
+                row[(x - left) // step] = char
+
+        if self.solution != None:
+            for state in self.solution["path"]:
+                mark(state, "+")
+
+        mark(self.goal, "B")
+        mark(self.start, "A")
+
+        lines = []
+        for row, y in enumerate(range(top, bottom, step)):
+            line = self.grid.row(y)[left:right:step].decode("latin-1")
+            line = line.translate(CHARS)
+
+            # terrain costs are shown as their digit
+            if self.grid.costs != None:
+                offset = y * self.width
+                costs = self.grid.costs[offset:offset + self.width][left:right:step]
+                line = "".join(
+                    char if cost == 1 else str(cost)
+                    for char, cost in zip(line, costs)
+                )
+
+            if row in marks:
+                line = list(line)
+                for column, char in marks[row].items():
+                    line[column] = char
+
+                line = "".join(line)
+
+            lines.append(line)
+
+        sys.stdout.write("\n".join(lines) + "\n\n")
 
     def routes(self, state):
         x, y = state
-        coords = [
-            ("UP", (x, y - 1)),
-            ("DOWN", (x, y + 1)),
-            ("LEFT", (x - 1, y)),
-            ("RIGHT", (x + 1, y)),
-        ]
+        bits = self.grid.walls.bits
 
         actions = []
-        for action, (x, y) in coords:
-            if 0 <= x < self.width and 0 <= y < self.height and not self.walls[y][x]:
-                actions.append((action, (x, y)))
+        for action, (dx, dy) in zip(ACTIONS, MOVES):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                cell = ny * self.width + nx
+                if not bits[cell >> 3] >> (cell & 7) & 1:
+                    actions.append((action, (nx, ny)))
 
         return actions
 
+    def timer(self, phase):
+        """Times a phase of the work if instruments are attached."""
+
+        if self.instruments == None:
+            return nullcontext()
+
+        return self.instruments.phase(phase)
+
+    def expanded(self, state):
+        """
+        Reports a state expanded by a search that runs its own loop instead
+        of going through a wrapped frontier. Only call it when instruments
+        are attached.
+        """
+
+        self.instruments.counters["pop"] += 1
+        if self.instruments.on_expand != None:
+            self.instruments.on_expand(
+                Node(state=state, parent=None, action=None)
+            )
+
     def solve(self):
+        try:
+            self.find()
+        except NoSolution:
+            sys.exit("no solution")
+
+    def find(self):
+        """Solves the maze, raising NoSolution when there is no path."""
+
+        with self.timer("search"):
+            # strategies that search from both ends run their own search loop
+            if hasattr(self.Frontier, "search"):
+                self.Frontier.search(self)
+                return
+
+            goal = self.search()
+
+        with self.timer("reconstruction"):
+            self.solution = self.backtrack(goal)
+
+    def find_path(self, max_nodes=None, timeout=None, cancel=None):
+        """
+        Solves the maze like solve(), but never exits and returns a Result
+        instead. The search gives up after exploring max_nodes states, after
+        timeout seconds, or once cancel.is_set() is true.
+        """
+
+        self.solution = None
+        self.suboptimality = None
+        self.num_explored = 0
+        self.budget = Budget(max_nodes, timeout, cancel)
+
+        start = time.perf_counter()
+        try:
+            self.find()
+            status = "solved"
+        except NoSolution:
+            status = "no solution"
+        except SearchStopped as stop:
+            status = stop.reason
+        finally:
+            self.budget = None
+
+        timings = {"solve": time.perf_counter() - start}
+        if self.instruments != None:
+            timings.update(self.instruments.timings)
+
+        return Result(status, self.solution, self.num_explored, timings,
+                      self.suboptimality)
+
+    def search(self):
+        """Runs the search with a frontier and returns the goal state."""
+
         # number of states explored
         self.num_explored = 0
 
         # initial state
         start = Node(state=self.start, parent=None, action=None)
         frontier = self.Frontier()
-        frontier.add(start)
+        if self.instruments != None:
+            frontier = self.instruments.wrap(frontier)
 
-        # goal will be used to calculate the heuristic in remove() method
-        # of MahnattanFrontier and ManhattanCostFrontier objects
+        # goal will be used to calculate the heuristic of the nodes added
+        # to MahnattanFrontier and ManhattanCostFrontier objects
         frontier.goal = self.goal
+        frontier.add(start)
 
         # states that have been explored
-        self.explored = set()
+        self.explored = CellSet(self.grid)
+
+        # terrain costs of the cells, if the maze has any
+        costs = self.grid.costs
+
+        # action code + 1 of the move that reached each explored cell, so
+        # nodes don't have to keep references to their parents: a node can
+        # be freed as soon as it leaves the frontier
+        self.parents = bytearray(self.width * self.height)
 
         while True:
             # if frontier is empty, no solution
             if frontier.is_empty():
-                sys.exit("no solution")
+                raise NoSolution
 
             # choose a node from the frontier
             node = frontier.remove()
-            self.num_explored += 1
+            if self.budget != None:
+                self.budget.check(self.num_explored)
 
-            if node.state == self.goal:
-                actions = []
-                path = []
+            self.num_explored += 1
 
-                while node.parent != None:
-                    actions.append(node.action)
-                    path.append(node.state)
-                    node = node.parent
+            if node.action != None:
+                cell = self.grid.cell(*node.state)
+                self.parents[cell] = ACTIONS.index(node.action) + 1
 
-                actions.reverse()
-                path.reverse()
-                self.solution = {"actions": actions, "path": path}
-                return
+            if node.state == self.goal:
+                return node.state
 
             # mark this node's state as explored
             self.explored.add(node.state)
@@ -215,50 +419,100 @@ class Maze:
             # add next routes to the frontier
             for action, state in self.routes(node.state):
                 if state not in self.explored and not frontier.contains_state(state):
-                    new_node = Node(state=state, parent=node,
-                                    action=action, cost=node.cost + 1)
+                    if costs == None:
+                        cost = node.cost + 1
+                    else:
+                        cost = node.cost + costs[state[1] * self.width + state[0]]
+
+                    new_node = Node(state=state, parent=None,
+                                    action=action, cost=cost)
                     frontier.add(new_node)
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        cell_size = 50
-        cell_border = 2
+    def solution_cost(self):
+        """Sum of the costs of moving into every cell of the solution."""
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
+        return sum(self.grid.cost(self.grid.cell(*state))
+                   for state in self.solution["path"])
+
+    def backtrack(self, state):
+        """Follows the parent map from state back to the start."""
+
+        actions = []
+        path = []
+
+        cell = self.grid.cell(*state)
+        while self.parents[cell] != 0:
+            code = self.parents[cell] - 1
+            dx, dy = MOVES[code]
+            actions.append(ACTIONS[code])
+            path.append(self.grid.coords(cell))
+            cell -= dy * self.width + dx
+
+        actions.reverse()
+        path.reverse()
+        return {"actions": actions, "path": path}
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2, rgba=False):
+        """
+        Saves a picture of the maze. It is saved as a palette image, which
+        encodes many times faster and smaller than a true-color one; pass
+        rgba=True for an RGBA image instead.
+        """
+        with self.timer("render"):
+            self.draw(filename, show_solution, show_explored, cell_size,
+                      cell_border, rgba)
+
+    def draw(self, filename, show_solution, show_explored, cell_size,
+             cell_border, rgba=False):
+        # the image is drawn at one pixel per cell, as indices into PALETTE,
+        # and then scaled up to full size with the cell borders drawn on top
+        cells = self.grid.walls.expand()
 
         solution = self.solution["path"] if self.solution != None else None
 
-        for y, row in enumerate(self.walls):
-            for x, is_wall in enumerate(row):
-                # for walls
-                if is_wall:
-                    fill = (40, 40, 40)
-                # for starting position
-                elif (x, y) == self.start:
-                    fill = (255, 0, 0)
-                # for goal position
-                elif (x, y) == self.goal:
-                    fill = (0, 171, 28)
-                # for solution path
-                elif show_solution and solution != None and (x, y) in solution:
-                    fill = (220, 235, 113)
-                # for explored nodes
-                elif show_explored and solution != None and (x, y) in self.explored:
-                    fill = (212, 97, 85)
-                # for empty cells
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
+        # for explored nodes (walls keep priority, as 1 + 2 is a wall too)
+        if show_explored and solution != None:
+            cells = (
+                int.from_bytes(cells, "little") +
+                2 * int.from_bytes(self.explored.expand(), "little")
+            ).to_bytes(len(cells), "little")
+
+        cells = bytearray(cells)
+
+        # for solution path
+        if show_solution and solution != None:
+            for state in solution:
+                cells[self.grid.cell(*state)] = PATH
+
+        # for starting and goal positions
+        cells[self.grid.cell(*self.start)] = START
+        cells[self.grid.cell(*self.goal)] = GOAL
+
+        img = Image.frombytes("P", (self.width, self.height), bytes(cells))
+        img.putpalette(PALETTE)
+        img = img.resize(
+            (self.width * cell_size, self.height * cell_size), Image.NEAREST
+        )
+
+        # cell borders, as strips across every line between two cells
+        if cell_border > 0:
+            draw = ImageDraw.Draw(img)
+            for x in range(self.width + 1):
                 draw.rectangle(
-                    ([(x * cell_size + cell_border, y * cell_size + cell_border),
-                      ((x + 1) * cell_size - cell_border, (y + 1) * cell_size - cell_border)]),
-                    fill=fill
+                    [(x * cell_size - cell_border + 1, 0),
+                     (x * cell_size + cell_border - 1, img.height - 1)],
+                    fill=BORDER
                 )
 
+            for y in range(self.height + 1):
+                draw.rectangle(
+                    [(0, y * cell_size - cell_border + 1),
+                     (img.width - 1, y * cell_size + cell_border - 1)],
+                    fill=BORDER
+                )
+
+        if rgba:
+            img = img.convert("RGBA")
+
         img.save(filename)
@@ -0,0 +1,192 @@
+import heapq
+import math
+
+from .grid import ACTIONS, CellSet
+from .result import NoSolution
+
+
+def manhattan_distance(grid, cell1, cell2):
+    x1, y1 = grid.coords(cell1)
+    x2, y2 = grid.coords(cell2)
+    return abs(x2 - x1) + abs(y2 - y1)
+
+
+def join(grid, forward, backward, meet):
+    """
+    Builds the solution through the cell where the two searches met. Both
+    maps hold cell -> (previous cell, action code, cost), where the action of
+    the backward map is the move from the previous cell to this one, as seen
+    from the goal.
+    """
+
+    actions = []
+    path = []
+
+    cell = meet
+    while forward[cell][0] != None:
+        parent, code, _ = forward[cell]
+        actions.append(ACTIONS[code])
+        path.append(grid.coords(cell))
+        cell = parent
+
+    actions.reverse()
+    path.reverse()
+
+    # the backward moves are flipped, as UP ^ 1 == DOWN and LEFT ^ 1 == RIGHT
+    cell = meet
+    while backward[cell][0] != None:
+        parent, code, _ = backward[cell]
+        actions.append(ACTIONS[code ^ 1])
+        path.append(grid.coords(parent))
+        cell = parent
+
+    return {"actions": actions, "path": path}
+
+
+class BidirectionalBFS:
+    """
+    Breadth-First Search from the start and the goal at once. Always finds
+    the shortest path.
+
+    Each step expands a whole layer of the smaller side, and the search stops
+    after the first layer that touches the other side, taking the cheapest of
+    the meeting points found in that layer.
+    """
+
+    @staticmethod
+    def search(maze):
+        grid = maze.grid
+        start = grid.cell(*maze.start)
+        goal = grid.cell(*maze.goal)
+
+        maze.num_explored = 0
+        maze.explored = CellSet(grid)
+
+        forward = {start: (None, None, 0)}
+        backward = {goal: (None, None, 0)}
+        forward_layer = [start]
+        backward_layer = [goal]
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                layer, seen, other = forward_layer, forward, backward
+            else:
+                layer, seen, other = backward_layer, backward, forward
+
+            best = math.inf
+            meet = None
+            next_layer = []
+            for cell in layer:
+                if maze.budget != None:
+                    maze.budget.check(maze.num_explored)
+
+                maze.num_explored += 1
+                if maze.instruments != None:
+                    maze.expanded(grid.coords(cell))
+
+                maze.explored.add(grid.coords(cell))
+
+                cost = seen[cell][2] + 1
+                for code, neighbor in grid.neighbors(cell):
+                    if neighbor not in seen:
+                        seen[neighbor] = (cell, code, cost)
+                        next_layer.append(neighbor)
+
+                        if neighbor in other and cost + other[neighbor][2] < best:
+                            best = cost + other[neighbor][2]
+                            meet = neighbor
+
+            if meet != None:
+                maze.solution = join(grid, forward, backward, meet)
+                return
+
+            if layer is forward_layer:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+
+        raise NoSolution
+
+
+class BidirectionalAStar:
+    """
+    A* Search from the start and the goal at once, towards each other. Always
+    finds the shortest path.
+
+    Each side uses the manhattan distance to the other end as its heuristic.
+    The search stops once the smallest f-value on either side is no smaller
+    than the cheapest path found through a meeting cell, since every shorter
+    path would have to pass through an open cell of both sides.
+    """
+
+    @staticmethod
+    def search(maze):
+        grid = maze.grid
+        start = grid.cell(*maze.start)
+        goal = grid.cell(*maze.goal)
+
+        maze.num_explored = 0
+        maze.explored = CellSet(grid)
+
+        # per side: cell -> (previous cell, action code, cost), closed cells,
+        # heap of (f, insertion order, cost, cell) and the cell aimed at
+        sides = [
+            ({start: (None, None, 0)}, set(), [], goal),
+            ({goal: (None, None, 0)}, set(), [], start),
+        ]
+        counter = 0
+        for seen, _, heap, target in sides:
+            cell = next(iter(seen))
+            heap.append((manhattan_distance(grid, cell, target), counter, 0, cell))
+            counter += 1
+
+        best = math.inf
+        meet = None
+        while True:
+            # drop entries that were closed or improved since they were pushed
+            for seen, closed, heap, _ in sides:
+                while heap and (heap[0][3] in closed or
+                                heap[0][2] > seen[heap[0][3]][2]):
+                    heapq.heappop(heap)
+
+            if not sides[0][2] or not sides[1][2]:
+                break
+
+            if max(sides[0][2][0][0], sides[1][2][0][0]) >= best:
+                break
+
+            # expand the side with the smaller open list
+            side = 0 if len(sides[0][2]) <= len(sides[1][2]) else 1
+            seen, closed, heap, target = sides[side]
+            other = sides[1 - side][0]
+
+            _, _, cost, cell = heapq.heappop(heap)
+            closed.add(cell)
+            if maze.budget != None:
+                maze.budget.check(maze.num_explored)
+
+            maze.num_explored += 1
+            if maze.instruments != None:
+                maze.expanded(grid.coords(cell))
+
+            maze.explored.add(grid.coords(cell))
+
+            cost += 1
+            for code, neighbor in grid.neighbors(cell):
+                if neighbor in closed:
+                    continue
+
+                if neighbor not in seen or cost < seen[neighbor][2]:
+                    seen[neighbor] = (cell, code, cost)
+                    f = cost + manhattan_distance(grid, neighbor, target)
+                    heapq.heappush(heap, (f, counter, cost, neighbor))
+                    counter += 1
+
+                if neighbor in other and seen[neighbor][2] + other[neighbor][2] < best:
+                    best = seen[neighbor][2] + other[neighbor][2]
+                    meet = neighbor
+
+        if meet == None:
+            raise NoSolution
+
+        maze.solution = join(grid, sides[0][0], sides[1][0], meet)
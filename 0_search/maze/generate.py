@@ -0,0 +1,131 @@
+import random
+
+
+def place(rows, start, goal):
+    """Opens the start and goal cells and marks them A and B."""
+
+    if start == goal:
+        raise Exception("maze is too small to place a start and a goal")
+
+    for (x, y), char in ((start, "A"), (goal, "B")):
+        rows[y][x] = char
+
+    return ["".join(row) for row in rows]
+
+
+def perfect(width, height, seed=0):
+    """
+    Maze with exactly one path between any two cells, carved by a depth-first
+    walk over the cells at even coordinates.
+    """
+
+    rng = random.Random(seed)
+    rows = [["#"] * width for _ in range(height)]
+
+    rows[0][0] = " "
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        neighbors = [
+            (x + dx, y + dy) for dx, dy in ((0, -2), (0, 2), (-2, 0), (2, 0))
+            if 0 <= x + dx < width and 0 <= y + dy < height and
+            rows[y + dy][x + dx] == "#"
+        ]
+        if not neighbors:
+            stack.pop()
+            continue
+
+        nx, ny = rng.choice(neighbors)
+        rows[(y + ny) // 2][(x + nx) // 2] = " "
+        rows[ny][nx] = " "
+        stack.append((nx, ny))
+
+    # the goal is the last cell at even coordinates
+    goal = ((width - 1) // 2 * 2, (height - 1) // 2 * 2)
+    return place(rows, (0, 0), goal)
+
+
+def rooms(width, height, seed=0, room_size=8):
+    """Grid of open rooms, with a door in every wall between two rooms."""
+
+    rng = random.Random(seed)
+    rows = [[" "] * width for _ in range(height)]
+
+    step = room_size + 1
+    for y in range(height):
+        for x in range(width):
+            if x % step == room_size or y % step == room_size:
+                rows[y][x] = "#"
+
+    # one door in each stretch of wall between two corners
+    for y in range(room_size, height, step):
+        for left in range(0, width, step):
+            rows[y][rng.randrange(left, min(left + room_size, width))] = " "
+
+    for x in range(room_size, width, step):
+        for top in range(0, height, step):
+            rows[rng.randrange(top, min(top + room_size, height))][x] = " "
+
+    # the goal is the far corner, moved off the wall if one ends there
+    goal = [width - 1, height - 1]
+    for axis in range(2):
+        if goal[axis] % step == room_size:
+            goal[axis] -= 1
+
+    return place(rows, (0, 0), tuple(goal))
+
+
+def spiral(width, height, seed=0):
+    """
+    Rings of walls around the centre, each with a single gap on the side
+    opposite to the gap of the ring outside it, so the only way in is a long
+    corridor. The seed is unused, as the layout is fixed by the size.
+    """
+
+    rows = [[" "] * width for _ in range(height)]
+
+    ring = 0
+    offset = 1
+    while width - 2 * offset > 2 and height - 2 * offset > 2:
+        left, top = offset, offset
+        right, bottom = width - 1 - offset, height - 1 - offset
+        for x in range(left, right + 1):
+            rows[top][x] = rows[bottom][x] = "#"
+
+        for y in range(top, bottom + 1):
+            rows[y][left] = rows[y][right] = "#"
+
+        if ring % 2 == 0:
+            rows[top + 1][left] = " "
+        else:
+            rows[bottom - 1][right] = " "
+
+        ring += 1
+        offset += 2
+
+    return place(rows, (0, 0), (width // 2, height // 2))
+
+
+def random_walls(width, height, seed=0, density=0.3):
+    """Every cell is a wall with the given probability."""
+
+    rng = random.Random(seed)
+    rows = [
+        ["#" if rng.random() < density else " " for _ in range(width)]
+        for _ in range(height)
+    ]
+    return place(rows, (0, 0), (width - 1, height - 1))
+
+
+def write(rows, filename):
+    with open(filename, "w") as file:
+        file.write("\n".join(rows) + "\n")
+
+
+# maze generators by name, each called as generator(width, height, seed)
+GENERATORS = {
+    "perfect": perfect,
+    "rooms": rooms,
+    "spiral": spiral,
+    "random": random_walls,
+}
@@ -0,0 +1,204 @@
+ACTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+
+# the 8 bits of every possible byte, spread out to one byte each
+SPREAD = [bytes(byte >> bit & 1 for bit in range(8)) for byte in range(256)]
+
+# (dx, dy) of each action, in the same order as ACTIONS
+MOVES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+class Bitset:
+    """
+    Set of non-negative integers below a fixed size, stored one bit each.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def __contains__(self, i):
+        return self.has(i)
+
+    def has(self, i):
+        return self.bits[i >> 3] >> (i & 7) & 1 == 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):
+            if byte:
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield (index << 3) | bit
+
+    def expand(self):
+        """Returns one byte per element, 1 for those in the set, else 0."""
+
+        return b"".join(map(SPREAD.__getitem__, self.bits))[:self.size]
+
+    def add(self, i):
+        if not self.has(i):
+            self.bits[i >> 3] |= 1 << (i & 7)
+            self.count += 1
+
+    def add_bits(self, start, digits):
+        """
+        Adds start + i for every i where digits, a bytes string of b"0" and
+        b"1", has a 1, all at once instead of one add() each.
+        """
+
+        if b"1" not in digits:
+            return
+
+        shift = start & 7
+        value = int(digits[::-1], 2) << shift
+        first = start >> 3
+        end = first + (shift + len(digits) + 7) // 8
+
+        old = int.from_bytes(self.bits[first:end], "little")
+        self.count += bin(value & ~old).count("1")
+        self.bits[first:end] = (old | value).to_bytes(end - first, "little")
+
+    def discard(self, i):
+        if self.has(i):
+            self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+            self.count -= 1
+
+
+class Grid:
+    """
+    Walls of a maze packed into a bitset. Cells are numbered row by row, so
+    the cell at (x, y) has the id y * width + x.
+
+    Moving into a cell costs 1, unless the maze gives it a terrain cost. The
+    costs are only stored, one byte per cell, once some cell has one.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.walls = Bitset(width * height)
+        self.costs = None
+
+    def cell(self, x, y):
+        return y * self.width + x
+
+    def coords(self, cell):
+        y, x = divmod(cell, self.width)
+        return x, y
+
+    def is_wall(self, cell):
+        return self.walls.has(cell)
+
+    def set_wall(self, cell, is_wall=True):
+        if is_wall:
+            self.walls.add(cell)
+        else:
+            self.walls.discard(cell)
+
+    def cost(self, cell):
+        return 1 if self.costs == None else self.costs[cell]
+
+    def set_cost(self, cell, cost):
+        if self.costs == None:
+            self.costs = bytearray([1]) * (self.width * self.height)
+
+        self.costs[cell] = cost
+
+    def row(self, y):
+        """Returns one byte per cell of row y, 1 for walls, else 0."""
+
+        start = y * self.width
+        offset = start & 7
+        span = self.walls.bits[start >> 3:(start + self.width + 7) >> 3]
+        return b"".join(map(SPREAD.__getitem__, span))[offset:offset + self.width]
+
+    def neighbors(self, cell):
+        """Yields (action code, cell) for every open cell next to this one."""
+
+        width = self.width
+        bits = self.walls.bits
+        y, x = divmod(cell, width)
+        for code, (dx, dy) in enumerate(MOVES):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < self.height:
+                neighbor = ny * width + nx
+                if not bits[neighbor >> 3] >> (neighbor & 7) & 1:
+                    yield code, neighbor
+
+
+class CellSet(Bitset):
+    """
+    Set of (x, y) states of a grid, stored as a bitset of cell ids.
+    """
+
+    def __init__(self, grid):
+        super().__init__(grid.width * grid.height)
+        self.grid = grid
+        self.width = grid.width
+
+    def __contains__(self, state):
+        i = state[1] * self.width + state[0]
+        return self.bits[i >> 3] >> (i & 7) & 1 == 1
+
+    def __iter__(self):
+        for cell in super().__iter__():
+            yield self.grid.coords(cell)
+
+    def add(self, state):
+        super().add(self.grid.cell(*state))
+
+    def discard(self, state):
+        super().discard(self.grid.cell(*state))
+
+
+class WallRows:
+    """
+    Read-only view of the walls of a grid as rows of booleans, so that
+    walls[y][x] looks a cell up without copying the grid. Use
+    Grid.set_wall() to change a wall.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def __len__(self):
+        return self.grid.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.grid.height
+
+        if not 0 <= y < self.grid.height:
+            raise IndexError("row out of range")
+
+        return WallRow(self.grid, y)
+
+    def __iter__(self):
+        for y in range(self.grid.height):
+            yield WallRow(self.grid, y)
+
+
+class WallRow:
+    """Read-only view of one row of a WallRows."""
+
+    def __init__(self, grid, y):
+        self.grid = grid
+        self.y = y
+
+    def __len__(self):
+        return self.grid.width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.grid.width
+
+        if not 0 <= x < self.grid.width:
+            raise IndexError("column out of range")
+
+        return self.grid.is_wall(self.y * self.grid.width + x)
+
+    def __iter__(self):
+        return map(bool, self.grid.row(self.y))
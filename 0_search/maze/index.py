@@ -0,0 +1,206 @@
+import heapq
+import pickle
+from array import array
+from collections import Counter, deque
+
+from .grid import ACTIONS
+from .loader import load_grid
+
+
+def distances_from(grid, cell):
+    """Breadth-first distance of every cell from cell, or -1 if unreachable."""
+
+    distances = array("i", [-1]) * (grid.width * grid.height)
+    distances[cell] = 0
+
+    queue = deque([cell])
+    while queue:
+        cell = queue.popleft()
+        distance = distances[cell] + 1
+        for _, neighbor in grid.neighbors(cell):
+            if distances[neighbor] == -1:
+                distances[neighbor] = distance
+                queue.append(neighbor)
+
+    return distances
+
+
+def label_components(grid):
+    """Numbers the connected areas of open cells, walls are labelled -1."""
+
+    labels = array("i", [-1]) * (grid.width * grid.height)
+    label = 0
+    for cell in range(grid.width * grid.height):
+        if labels[cell] != -1 or grid.is_wall(cell):
+            continue
+
+        labels[cell] = label
+        stack = [cell]
+        while stack:
+            for _, neighbor in grid.neighbors(stack.pop()):
+                if labels[neighbor] == -1:
+                    labels[neighbor] = label
+                    stack.append(neighbor)
+
+        label += 1
+
+    return labels
+
+
+class MazeIndex:
+    """
+    Precomputed facts about the walls of a maze, for answering many start to
+    goal queries on the same layout without parsing or searching it again.
+
+    - components: connected area of every cell, so queries between two
+      areas are answered with no solution straight away
+    - landmarks: distances from a few far apart cells, which give the ALT
+      heuristic |d(l, goal) - d(l, cell)|, never weaker than the manhattan
+      distance it is combined with
+    - goal: optionally, the distance of every cell from a fixed goal, so
+      queries to that goal just walk downhill
+    """
+
+    def __init__(self, grid, landmarks=4, goal=None):
+        self.grid = grid
+        self.components = label_components(grid)
+
+        # landmarks are picked far apart in the largest area: each one is
+        # the cell furthest from the landmarks picked before it
+        self.landmarks = []
+        self.distances = []
+        sizes = Counter(self.components)
+        del sizes[-1]
+        if sizes and landmarks > 0:
+            first = self.components.index(sizes.most_common(1)[0][0])
+            spread = distances_from(grid, first)
+            for _ in range(landmarks):
+                landmark = max(range(len(spread)), key=spread.__getitem__)
+                if spread[landmark] <= 0:
+                    break
+
+                self.landmarks.append(landmark)
+                self.distances.append(distances_from(grid, landmark))
+                spread = array("i", (
+                    min(d, s) for d, s in zip(self.distances[-1], spread)
+                ))
+
+        self.goal = goal
+        self.goal_distances = None
+        if goal != None:
+            self.goal_distances = distances_from(grid, grid.cell(*goal))
+
+        # number of states explored by the last query
+        self.num_explored = 0
+
+    @classmethod
+    def from_file(cls, filename, landmarks=4, fixed_goal=False):
+        """Indexes a maze file, using its goal as the fixed goal if asked."""
+
+        grid, _, goal = load_grid(filename)
+        return cls(grid, landmarks, goal if fixed_goal else None)
+
+    def save(self, filename):
+        with open(filename, "wb") as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(filename):
+        with open(filename, "rb") as file:
+            index = pickle.load(file)
+
+        if not isinstance(index, MazeIndex):
+            raise Exception("file does not hold a maze index")
+
+        return index
+
+    def connected(self, start, goal):
+        label = self.components[self.grid.cell(*start)]
+        return label != -1 and label == self.components[self.grid.cell(*goal)]
+
+    def heuristic(self, cell, goal):
+        x1, y1 = self.grid.coords(cell)
+        x2, y2 = self.grid.coords(goal)
+        best = abs(x2 - x1) + abs(y2 - y1)
+
+        for distances in self.distances:
+            if distances[cell] != -1 and distances[goal] != -1:
+                best = max(best, abs(distances[goal] - distances[cell]))
+
+        return best
+
+    def query(self, start, goal):
+        """
+        Finds a shortest path from start to goal, in the same
+        {"actions", "path"} shape as Maze.solution, or None if there is none.
+        """
+
+        self.num_explored = 0
+        if not self.connected(start, goal):
+            return None
+
+        if self.goal_distances != None and goal == self.goal:
+            return self.descend(start)
+
+        grid = self.grid
+        start = grid.cell(*start)
+        goal = grid.cell(*goal)
+
+        # cell -> (previous cell, action code, cost)
+        parents = {start: (None, None, 0)}
+        explored = set()
+        frontier = [(self.heuristic(start, goal), 0, 0, start)]
+        counter = 1
+
+        while frontier:
+            _, _, cost, cell = heapq.heappop(frontier)
+            if cell in explored:
+                continue
+
+            self.num_explored += 1
+            if cell == goal:
+                break
+
+            explored.add(cell)
+            cost += 1
+            for code, neighbor in grid.neighbors(cell):
+                if neighbor in explored:
+                    continue
+
+                if neighbor not in parents or cost < parents[neighbor][2]:
+                    parents[neighbor] = (cell, code, cost)
+                    f = cost + self.heuristic(neighbor, goal)
+                    heapq.heappush(frontier, (f, counter, cost, neighbor))
+                    counter += 1
+
+        actions = []
+        path = []
+        cell = goal
+        while parents[cell][0] != None:
+            parent, code, _ = parents[cell]
+            actions.append(ACTIONS[code])
+            path.append(grid.coords(cell))
+            cell = parent
+
+        actions.reverse()
+        path.reverse()
+        return {"actions": actions, "path": path}
+
+    def descend(self, start):
+        """Walks down the distance field from start to the fixed goal."""
+
+        actions = []
+        path = []
+
+        cell = self.grid.cell(*start)
+        while self.goal_distances[cell] != 0:
+            self.num_explored += 1
+            for code, neighbor in self.grid.neighbors(cell):
+                if self.goal_distances[neighbor] == self.goal_distances[cell] - 1:
+                    break
+
+            actions.append(ACTIONS[code])
+            path.append(self.grid.coords(neighbor))
+            cell = neighbor
+
+        return {"actions": actions, "path": path}
@@ -0,0 +1,89 @@
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+class Instruments:
+    """
+    Opt-in counters and timers for a Maze. When passed to Maze(), the frontier
+    used by solve() is wrapped so that its calls are counted, the parse,
+    search, reconstruction and render phases are timed, and on_expand is
+    called with every node removed from the frontier.
+
+    Strategies with their own search loop report each expanded state
+    through Maze.expanded() instead, as a node without parent or action;
+    they have no frontier to count pushes or measure, so report() gives
+    None for peak_frontier then.
+
+    Without one, Maze uses the frontier as is and pays nothing for this.
+    """
+
+    def __init__(self, on_expand=None):
+        self.on_expand = on_expand
+        self.counters = Counter()  # "push", "pop" and "contains" calls
+        self.peak_frontier = 0  # largest number of nodes in the frontier
+        self.timings = defaultdict(float)  # seconds spent in each phase
+        self.wrapped = False  # whether a frontier was wrapped and measured
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def wrap(self, frontier):
+        self.wrapped = True
+        return InstrumentedFrontier(frontier, self)
+
+    def report(self):
+        return {
+            "counters": dict(self.counters),
+            "peak_frontier": self.peak_frontier if self.wrapped else None,
+            "timings": dict(self.timings),
+        }
+
+
+class InstrumentedFrontier:
+    """
+    Frontier that counts the calls made to the frontier it wraps.
+    """
+
+    def __init__(self, frontier, instruments):
+        self.wrapped = frontier
+        self.instruments = instruments
+        self.size = 0
+
+    @property
+    def goal(self):
+        return self.wrapped.goal
+
+    @goal.setter
+    def goal(self, goal):
+        self.wrapped.goal = goal
+
+    def add(self, node):
+        self.instruments.counters["push"] += 1
+        self.size += 1
+        if self.size > self.instruments.peak_frontier:
+            self.instruments.peak_frontier = self.size
+
+        self.wrapped.add(node)
+
+    def contains_state(self, state):
+        self.instruments.counters["contains"] += 1
+        return self.wrapped.contains_state(state)
+
+    def is_empty(self):
+        return self.wrapped.is_empty()
+
+    def remove(self):
+        node = self.wrapped.remove()
+        self.instruments.counters["pop"] += 1
+        self.size -= 1
+
+        if self.instruments.on_expand != None:
+            self.instruments.on_expand(node)
+
+        return node
@@ -0,0 +1,147 @@
+import heapq
+
+from .grid import ACTIONS, MOVES, CellSet
+from .result import NoSolution
+
+
+class JumpPointSearch:
+    """
+    Jump Point Search, for 4-connected mazes where every move costs 1.
+    Always finds the shortest path, like A*, but only expands jump points.
+
+    Paths are taken in a canonical order where vertical moves come before
+    horizontal ones, so a horizontal jump only stops where a cell above or
+    below opens up, and a vertical jump also stops wherever a horizontal jump
+    from it would stop. Every other cell on the way is skipped over.
+    """
+
+    @staticmethod
+    def search(maze):
+        grid = maze.grid
+        width = maze.width
+        height = maze.height
+        bits = grid.walls.bits
+        goal = maze.goal
+
+        def is_open(x, y):
+            if 0 <= x < width and 0 <= y < height:
+                cell = y * width + x
+                return not bits[cell >> 3] >> (cell & 7) & 1
+
+            return False
+
+        def jump_horizontal(x, y, dx):
+            while True:
+                x += dx
+                if not is_open(x, y):
+                    return None
+
+                if (x, y) == goal:
+                    return (x, y)
+
+                if ((is_open(x, y - 1) and not is_open(x - dx, y - 1)) or
+                        (is_open(x, y + 1) and not is_open(x - dx, y + 1))):
+                    return (x, y)
+
+        def jump_vertical(x, y, dy):
+            while True:
+                y += dy
+                if not is_open(x, y):
+                    return None
+
+                if (x, y) == goal:
+                    return (x, y)
+
+                if ((is_open(x - 1, y) and not is_open(x - 1, y - dy)) or
+                        (is_open(x + 1, y) and not is_open(x + 1, y - dy))):
+                    return (x, y)
+
+                if jump_horizontal(x, y, 1) or jump_horizontal(x, y, -1):
+                    return (x, y)
+
+        def heuristic(state):
+            return abs(goal[0] - state[0]) + abs(goal[1] - state[1])
+
+        maze.num_explored = 0
+        maze.explored = CellSet(grid)
+
+        # jump point -> (previous jump point, cost)
+        parents = {maze.start: (None, 0)}
+        frontier = [(heuristic(maze.start), 0, 0, maze.start)]
+        counter = 1
+
+        while frontier:
+            _, _, cost, state = heapq.heappop(frontier)
+            if state in maze.explored or cost > parents[state][1]:
+                continue
+
+            if maze.budget != None:
+                maze.budget.check(maze.num_explored)
+
+            maze.num_explored += 1
+            if maze.instruments != None:
+                maze.expanded(state)
+
+            if state == goal:
+                maze.solution = fill(parents, state)
+                return
+
+            maze.explored.add(state)
+
+            # only the natural and forced directions are searched, which for
+            # 4-connected moves is straight ahead and both sides
+            x, y = state
+            parent = parents[state][0]
+            if parent == None:
+                directions = MOVES
+            elif parent[1] == y:
+                dx = 1 if x > parent[0] else -1
+                directions = ((dx, 0), (0, -1), (0, 1))
+            else:
+                dy = 1 if y > parent[1] else -1
+                directions = ((0, dy), (-1, 0), (1, 0))
+
+            for dx, dy in directions:
+                if dx != 0:
+                    point = jump_horizontal(x, y, dx)
+                else:
+                    point = jump_vertical(x, y, dy)
+
+                if point == None or point in maze.explored:
+                    continue
+
+                new_cost = cost + abs(point[0] - x) + abs(point[1] - y)
+                if point not in parents or new_cost < parents[point][1]:
+                    parents[point] = (state, new_cost)
+                    heapq.heappush(
+                        frontier,
+                        (new_cost + heuristic(point), counter, new_cost, point)
+                    )
+                    counter += 1
+
+        raise NoSolution
+
+
+def fill(parents, state):
+    """Walks the jump points back to the start, filling in the cells between."""
+
+    actions = []
+    path = []
+
+    while parents[state][0] != None:
+        parent = parents[state][0]
+        dx = (state[0] > parent[0]) - (state[0] < parent[0])
+        dy = (state[1] > parent[1]) - (state[1] < parent[1])
+        action = ACTIONS[MOVES.index((dx, dy))]
+
+        x, y = state
+        while (x, y) != parent:
+            actions.append(action)
+            path.append((x, y))
+            x, y = x - dx, y - dy
+
+        state = parent
+
+    actions.reverse()
+    path.reverse()
+    return {"actions": actions, "path": path}
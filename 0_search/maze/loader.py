@@ -0,0 +1,127 @@
+import mmap
+
+from .grid import Grid
+
+# open cells that cost their digit to move into, instead of 1
+TERRAIN = "123456789"
+
+# translation of the bytes of an ASCII line to b"1" for walls, else b"0"
+WALL_DIGITS = bytes(
+    ord("0") if chr(c) in " AB" + TERRAIN else ord("1") for c in range(256)
+)
+
+# every byte but the terrain digits, to find out if a line has any
+NOT_TERRAIN = bytes(c for c in range(256) if chr(c) not in TERRAIN)
+
+
+def read_lines(mm):
+    """Yields the lines of a memory-mapped file as bytes, without newlines."""
+
+    size = len(mm)
+    start = 0
+    while start < size:
+        end = mm.find(b"\n", start)
+        if end == -1:
+            end = size
+
+        line = mm[start:end]
+        if line.endswith(b"\r"):
+            line = line[:-1]
+
+        yield line
+        start = end + 1
+
+
+def parse_row(grid, line, y, start, goal):
+    """Parses an ASCII line of a maze into row y of grid."""
+
+    offset = y * grid.width
+    grid.walls.add_bits(offset, line.translate(WALL_DIGITS))
+
+    x = line.find(b"A")
+    if x != -1:
+        if start != None or line.count(b"A") > 1:
+            raise Exception("maze must have exactly one starting point")
+
+        start = (x, y)
+
+    x = line.find(b"B")
+    if x != -1:
+        if goal != None or line.count(b"B") > 1:
+            raise Exception("maze muse have exactly one goal")
+
+        goal = (x, y)
+
+    if line.translate(None, NOT_TERRAIN):
+        for x, c in enumerate(line):
+            if chr(c) in TERRAIN:
+                grid.set_cost(offset + x, c - ord("0"))
+
+    return start, goal
+
+
+def parse_chars(grid, text, y, start, goal):
+    """Parses a line of a maze into row y of grid, one character at a time."""
+
+    offset = y * grid.width
+    for x, c in enumerate(text):
+        if c == " ":
+            continue
+        elif c == "A":
+            if start != None:
+                raise Exception("maze must have exactly one starting point")
+
+            start = (x, y)
+        elif c == "B":
+            if goal != None:
+                raise Exception("maze muse have exactly one goal")
+
+            goal = (x, y)
+        elif c in TERRAIN:
+            grid.set_cost(offset + x, int(c))
+        else:
+            grid.walls.add(offset + x)
+
+    return start, goal
+
+
+def load_grid(filename):
+    """
+    Parses a maze file into a Grid, one row at a time, straight from a
+    memory map of the file. Returns (grid, start, goal).
+    """
+
+    with open(filename, "rb") as file:
+        if file.seek(0, 2) == 0:
+            raise Exception("maze must have exactly one starting point")
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # first pass only measures the maze, so the grid can be allocated
+            height = 0
+            width = 0
+            for line in read_lines(mm):
+                height += 1
+                length = len(line) if line.isascii() else len(line.decode())
+                if length > width:
+                    width = length
+
+            grid = Grid(width, height)
+            start = None
+            goal = None
+
+            # second pass fills in the walls and validates the starting and
+            # goal positions on the way, a whole row at a time with bytes
+            # methods; only lines with non-ASCII characters are decoded
+            for y, line in enumerate(read_lines(mm)):
+                if line.isascii():
+                    start, goal = parse_row(grid, line, y, start, goal)
+                else:
+                    start, goal = parse_chars(grid, line.decode(), y, start,
+                                              goal)
+
+    if start == None:
+        raise Exception("maze must have exactly one starting point")
+    elif goal == None:
+        raise Exception("maze muse have exactly one goal")
+
+    return grid, start, goal
@@ -0,0 +1,142 @@
+import heapq
+import math
+
+from .grid import ACTIONS, MOVES, CellSet
+
+
+class Replanner:
+    """
+    Lifelong Planning A* (LPA*) on a maze whose walls change between
+    queries. After the first solve(), toggle_wall() repairs the solution by
+    re-expanding only the cells whose distance from the start was changed by
+    the edit, reusing every other g-value of the earlier searches.
+
+    g is the distance of a cell found by the last expansion, and rhs the one
+    its neighbors currently imply. Cells where the two differ are queued,
+    ordered like A* by [min(g, rhs) + h, min(g, rhs)].
+
+    The maze's solution, num_explored and explored are updated on each call.
+    The solution is None rather than an exit when there is no path, since an
+    edit may well close off the goal for a while.
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.grid = maze.grid
+        self.start = self.grid.cell(*maze.start)
+        self.goal = self.grid.cell(*maze.goal)
+
+        self.g = {}
+        self.rhs = {self.start: 0}
+        self.queue = []  # heap of (key, insertion order, cell)
+        self.keys = {}  # cell -> its current key in the queue
+        self.counter = 0
+        self.push(self.start)
+
+    def heuristic(self, cell):
+        x1, y1 = self.grid.coords(cell)
+        x2, y2 = self.grid.coords(self.goal)
+        return abs(x2 - x1) + abs(y2 - y1)
+
+    def key(self, cell):
+        distance = min(self.g.get(cell, math.inf), self.rhs.get(cell, math.inf))
+        return (distance + self.heuristic(cell), distance)
+
+    def push(self, cell):
+        key = self.key(cell)
+        self.keys[cell] = key
+        heapq.heappush(self.queue, (key, self.counter, cell))
+        self.counter += 1
+
+    def top_key(self):
+        # entries of cells that were updated since they were pushed are stale
+        while self.queue and self.keys.get(self.queue[0][2]) != self.queue[0][0]:
+            heapq.heappop(self.queue)
+
+        return self.queue[0][0] if self.queue else (math.inf, math.inf)
+
+    def update(self, cell):
+        if cell != self.start:
+            if self.grid.is_wall(cell):
+                self.rhs[cell] = math.inf
+            else:
+                self.rhs[cell] = min(
+                    (self.g.get(n, math.inf) + 1
+                     for _, n in self.grid.neighbors(cell)),
+                    default=math.inf
+                )
+
+        self.keys.pop(cell, None)
+        if self.g.get(cell, math.inf) != self.rhs.get(cell, math.inf):
+            self.push(cell)
+
+    def solve(self):
+        maze = self.maze
+        maze.num_explored = 0
+        maze.explored = CellSet(self.grid)
+
+        while (self.top_key() < self.key(self.goal) or
+               self.rhs.get(self.goal, math.inf) != self.g.get(self.goal, math.inf)):
+            if not self.queue:
+                break
+
+            _, _, cell = heapq.heappop(self.queue)
+            del self.keys[cell]
+            maze.num_explored += 1
+            maze.explored.add(self.grid.coords(cell))
+
+            if self.g.get(cell, math.inf) > self.rhs[cell]:
+                # overconsistent: the cell got closer, settle it
+                self.g[cell] = self.rhs[cell]
+            else:
+                # underconsistent: the cell got further, recompute it too
+                self.g[cell] = math.inf
+                self.update(cell)
+
+            for _, neighbor in self.grid.neighbors(cell):
+                self.update(neighbor)
+
+        maze.solution = self.path()
+
+    def path(self):
+        """Walks down the g-values from the goal back to the start."""
+
+        if self.g.get(self.goal, math.inf) == math.inf:
+            return None
+
+        actions = []
+        path = []
+
+        cell = self.goal
+        while cell != self.start:
+            code, parent = min(
+                self.grid.neighbors(cell),
+                key=lambda neighbor: self.g.get(neighbor[1], math.inf)
+            )
+
+            # the move from the parent to this cell is the opposite one
+            actions.append(ACTIONS[code ^ 1])
+            path.append(self.grid.coords(cell))
+            cell = parent
+
+        actions.reverse()
+        path.reverse()
+        return {"actions": actions, "path": path}
+
+    def toggle_wall(self, state):
+        """Turns an open cell into a wall or back, and repairs the solution."""
+
+        if state == self.maze.start or state == self.maze.goal:
+            raise Exception("cannot put a wall on the start or the goal")
+
+        x, y = state
+        cell = self.grid.cell(x, y)
+        self.grid.set_wall(cell, not self.grid.is_wall(cell))
+
+        # the cell and all the cells next to it may have a new rhs
+        self.update(cell)
+        for dx, dy in MOVES:
+            if 0 <= x + dx < self.grid.width and 0 <= y + dy < self.grid.height:
+                self.update(self.grid.cell(x + dx, y + dy))
+
+        self.solve()
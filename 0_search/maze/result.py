@@ -0,0 +1,71 @@
+import time
+
+
+class NoSolution(Exception):
+    """Raised by a search that ran out of states without reaching the goal."""
+
+
+class SearchStopped(Exception):
+    """Raised by a search that was stopped by its Budget."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Budget:
+    """
+    Limits on a single search: the number of states it may explore, the
+    seconds it may take, and a cancel flag, which is any object with an
+    is_set() method such as a threading.Event or multiprocessing.Event.
+    """
+
+    def __init__(self, max_nodes=None, timeout=None, cancel=None):
+        self.max_nodes = max_nodes
+        self.deadline = None
+        if timeout != None:
+            self.deadline = time.monotonic() + timeout
+
+        self.cancel = cancel
+
+    def check(self, num_explored):
+        """
+        Called before exploring each state, with the number of states
+        explored so far, so a stopped search never reports more than
+        max_nodes.
+        """
+        if self.max_nodes != None and num_explored >= self.max_nodes:
+            raise SearchStopped("budget exceeded")
+
+        if self.deadline != None and time.monotonic() > self.deadline:
+            raise SearchStopped("timed out")
+
+        if self.cancel != None and self.cancel.is_set():
+            raise SearchStopped("cancelled")
+
+
+class Result:
+    """
+    Outcome of Maze.find_path(). status is one of "solved", "no solution",
+    "budget exceeded", "timed out" or "cancelled"; actions and path are None
+    unless the maze was solved, or an anytime search like ARA* was stopped
+    after finding a path. suboptimality is then the bound on how much
+    costlier than the cheapest path that path may be, and None for the
+    searches that don't report one.
+    """
+
+    def __init__(self, status, solution, num_explored, timings,
+                 suboptimality=None):
+        self.status = status
+        self.actions = solution["actions"] if solution != None else None
+        self.path = solution["path"] if solution != None else None
+        self.num_explored = num_explored
+        self.timings = timings
+        self.suboptimality = suboptimality
+
+    def __repr__(self):
+        return f"Result({self.status}, explored={self.num_explored})"
+
+    @property
+    def solved(self):
+        return self.status == "solved"
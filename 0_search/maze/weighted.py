@@ -0,0 +1,179 @@
+import heapq
+import math
+
+from .grid import CellSet
+from .result import NoSolution
+
+
+def best_first(maze, weight):
+    """
+    Best-first search on the terrain costs, ordered by g + weight * h with
+    the manhattan distance as h. A weight of 0 is Dijkstra's algorithm and 1
+    is A*; above 1 the path costs at most weight times the optimal one.
+    """
+
+    grid = maze.grid
+    width = maze.width
+    gx, gy = maze.goal
+    start = grid.cell(*maze.start)
+    goal = grid.cell(gx, gy)
+
+    maze.num_explored = 0
+    maze.explored = CellSet(grid)
+    maze.parents = bytearray(width * maze.height)
+
+    costs = {start: 0}
+    frontier = [(0, 0, 0, start)]
+    counter = 1
+
+    while frontier:
+        _, _, cost, cell = heapq.heappop(frontier)
+        if cost > costs[cell] or maze.explored.has(cell):
+            continue
+
+        if maze.budget != None:
+            maze.budget.check(maze.num_explored)
+
+        maze.num_explored += 1
+        if maze.instruments != None:
+            maze.expanded(grid.coords(cell))
+
+        if cell == goal:
+            maze.solution = maze.backtrack(maze.goal)
+            return
+
+        maze.explored.add(grid.coords(cell))
+
+        for code, neighbor in grid.neighbors(cell):
+            new_cost = cost + grid.cost(neighbor)
+            if new_cost < costs.get(neighbor, math.inf) and not maze.explored.has(neighbor):
+                costs[neighbor] = new_cost
+                maze.parents[neighbor] = code + 1
+
+                y, x = divmod(neighbor, width)
+                f = new_cost + weight * (abs(gx - x) + abs(gy - y))
+                heapq.heappush(frontier, (f, counter, new_cost, neighbor))
+                counter += 1
+
+    raise NoSolution
+
+
+class Dijkstra:
+    """
+    Dijkstra's algorithm. Always finds the cheapest path, taking the terrain
+    costs into account.
+    """
+
+    @staticmethod
+    def search(maze):
+        best_first(maze, 0)
+
+
+class WeightedAStar:
+    """
+    A* with the heuristic multiplied by weight >= 1, which trades optimality
+    for speed: the path found costs at most weight times the cheapest one,
+    but far fewer states are explored. Use WeightedAStar.with_weight() for
+    weights other than the default.
+    """
+
+    weight = 1.5
+
+    @classmethod
+    def with_weight(cls, weight):
+        if weight < 1:
+            raise Exception("weight must be at least 1")
+
+        return type(f"{cls.__name__}({weight})", (cls,), {"weight": weight})
+
+    @classmethod
+    def search(cls, maze):
+        best_first(maze, cls.weight)
+
+
+class AnytimeRepairingAStar:
+    """
+    Anytime Repairing A* (ARA*). Finds a path quickly with a large weight,
+    then keeps lowering the weight by step down to 1, reusing the earlier
+    work instead of starting over, until the path is the cheapest one.
+
+    After each round maze.solution holds the best path so far and
+    maze.suboptimality its bound, so a find_path() stopped by its timeout
+    still returns that path.
+    """
+
+    weight = 3.0
+    step = 0.5
+
+    @classmethod
+    def search(cls, maze):
+        grid = maze.grid
+        width = maze.width
+        gx, gy = maze.goal
+        start = grid.cell(*maze.start)
+        goal = grid.cell(gx, gy)
+
+        def heuristic(cell):
+            y, x = divmod(cell, width)
+            return abs(gx - x) + abs(gy - y)
+
+        maze.num_explored = 0
+        maze.explored = CellSet(grid)
+        maze.parents = bytearray(width * maze.height)
+
+        costs = {start: 0}
+        opened = {start}  # cells waiting to be expanded in this round
+        inconsistent = set()  # cells improved after their expansion
+        closed = set()
+
+        weight = cls.weight
+        while True:
+            frontier = [
+                (costs[cell] + weight * heuristic(cell), cell) for cell in opened
+            ]
+            heapq.heapify(frontier)
+
+            # improve the path until nothing open could lead to a cheaper one
+            while frontier and frontier[0][0] < costs.get(goal, math.inf):
+                _, cell = heapq.heappop(frontier)
+                if cell not in opened:
+                    continue
+
+                opened.discard(cell)
+                closed.add(cell)
+                if maze.budget != None:
+                    maze.budget.check(maze.num_explored)
+
+                maze.num_explored += 1
+                if maze.instruments != None:
+                    maze.expanded(grid.coords(cell))
+
+                maze.explored.add(grid.coords(cell))
+
+                for code, neighbor in grid.neighbors(cell):
+                    new_cost = costs[cell] + grid.cost(neighbor)
+                    if new_cost < costs.get(neighbor, math.inf):
+                        costs[neighbor] = new_cost
+                        maze.parents[neighbor] = code + 1
+
+                        if neighbor in closed:
+                            inconsistent.add(neighbor)
+                        else:
+                            opened.add(neighbor)
+                            f = new_cost + weight * heuristic(neighbor)
+                            heapq.heappush(frontier, (f, neighbor))
+
+            if goal not in costs:
+                raise NoSolution
+
+            maze.solution = maze.backtrack(maze.goal)
+            maze.suboptimality = weight
+
+            if weight <= 1:
+                return
+
+            # the next round starts from what is still open or was improved
+            weight = max(1, weight - cls.step)
+            opened |= inconsistent
+            inconsistent = set()
+            closed = set()
@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import maze
+
+# outcomes that don't depend on how busy the server was, so can be cached
+CACHED_STATUSES = {"solved", "no solution", "budget exceeded"}
+
+
+def solve(body, algorithm, image, max_nodes, timeout):
+    """
+    Solves a maze given as text, in a worker process. Returns the status
+    and the encoded response.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "maze.txt")
+        with open(filename, "w") as file:
+            file.write(body)
+
+        m = maze.Maze(filename, maze.ALGORITHMS[algorithm])
+        result = m.find_path(max_nodes=max_nodes, timeout=timeout)
+
+        response = {
+            "status": result.status,
+            "actions": result.actions,
+            "path": result.path,
+            "suboptimality": result.suboptimality,
+            "explored": result.num_explored,
+            "seconds": result.timings["solve"],
+            "image": None,
+        }
+
+        if image and result.solved:
+            png = os.path.join(directory, "maze.png")
+            m.output_image(png, show_explored=True)
+            with open(png, "rb") as file:
+                response["image"] = base64.b64encode(file.read()).decode()
+
+    return result.status, json.dumps(response).encode()
+
+
+class ResultCache:
+    """
+    Least recently used cache of encoded responses, which evicts the oldest
+    entries once their total size goes over max_bytes.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        if key not in self.entries:
+            return None
+
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+
+        self.entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class Service:
+    """
+    Solves mazes in a process pool. Identical requests that arrive while one
+    of them is being solved share its result, and finished results are
+    served from the cache, except those that timed out.
+    """
+
+    def __init__(self, executor, cache):
+        self.executor = executor
+        self.cache = cache
+        self.pending = {}  # key -> future of a solve in progress
+
+    async def solve(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+
+        body = request.get("maze")
+        algorithm = request.get("algorithm", "a_star")
+        image = bool(request.get("image", False))
+        max_nodes = request.get("max_nodes")
+        timeout = request.get("timeout")
+
+        if not isinstance(body, str):
+            raise ValueError("maze must be the text of a maze")
+
+        if algorithm not in maze.ALGORITHMS:
+            raise ValueError(f"unknown algorithm: {algorithm}")
+
+        digest = hashlib.sha256(body.encode()).hexdigest()
+        key = (digest, algorithm, image, max_nodes, timeout)
+
+        cached = self.cache.get(key)
+        if cached != None:
+            return cached
+
+        if key not in self.pending:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self.executor, solve, body, algorithm, image, max_nodes, timeout
+            )
+            future.add_done_callback(lambda _: self.pending.pop(key, None))
+            self.pending[key] = future
+
+        status, response = await asyncio.shield(self.pending[key])
+        if status in CACHED_STATUSES:
+            self.cache.put(key, response)
+
+        return response
+
+    async def handle(self, reader, writer):
+        """Serves one HTTP request: POST /solve with a JSON body."""
+
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            if method != "POST" or path != "/solve":
+                await respond(writer, 404, b'{"error": "not found"}')
+                return
+
+            length = int(headers.get("content-length", 0))
+            request = json.loads(await reader.readexactly(length))
+            response = await self.solve(request)
+            await respond(writer, 200, response)
+        except (ValueError, TypeError) as error:
+            await respond(writer, 400, json.dumps({"error": str(error)}).encode())
+        except Exception as error:
+            # e.g. a maze without exactly one start and one goal
+            await respond(writer, 422, json.dumps({"error": str(error)}).encode())
+        finally:
+            writer.close()
+
+
+async def respond(writer, status, body):
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found",
+               422: "Unprocessable Entity"}
+    writer.write(
+        f"HTTP/1.1 {status} {reasons[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+
+async def serve(args):
+    # workers forked from this process would inherit the listening socket
+    # and whatever connections are open at the time, and keep them open
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(
+        max_workers=args.jobs, mp_context=context
+    ) as executor:
+        service = Service(executor, ResultCache(args.cache_bytes))
+        if args.unix:
+            server = await asyncio.start_unix_server(service.handle, args.unix)
+        else:
+            server = await asyncio.start_server(
+                service.handle, args.host, args.port
+            )
+
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve maze solutions over HTTP: POST /solve with "
+                    '{"maze": "...", "algorithm": "a_star", "image": false}'
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument(
+        "--unix", default=None, help="listen on this Unix socket instead"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--cache-bytes", type=int, default=64 * 1024 * 1024,
+        help="total size of the cached responses"
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -23,13 +23,14 @@ def check_knowledge(knowledge):
     print(knowledge)
     print()
 
-    for sym in symbols:
+    # all the cards are checked in one pass over the models
+    for sym, answer in zip(symbols, check_queries(knowledge, symbols)):
         # check if this card is surely 'there' inside the envelope
-        if model_check(knowledge, sym):
+        if answer == "entailed":
             termcolor.cprint(f"{sym}: YES", "green")
 
         # check if this card is surely 'not there' inside the envelope
-        elif model_check(knowledge, Not(sym)):
+        elif answer == "refuted":
             termcolor.cprint(f"{sym}: NO", "red")
 
         # otherwise we are not sure whether it is there inside the envelope or not
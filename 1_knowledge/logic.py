@@ -1,13 +1,70 @@
+import collections
+import itertools
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
 class Sentence:
     def evaluate(self, model):
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates this sentence when model may leave some symbols out:
+        returns True or False if every completion of model agrees on it,
+        else None.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         return ""
 
     def symbols(self):
         return set()
 
+    def count_symbols(self, counts):
+        """Adds the number of occurrences of each symbol to counts."""
+        pass
+
+    def expression(self, index):
+        """
+        Python expression of this sentence over a tuple m of truth values,
+        where index maps each symbol name to its position in m.
+        """
+        raise Exception("nothing to compile")
+
+    def freeze(self):
+        """
+        Returns the interned, immutable copy of this sentence: equal
+        sentences freeze to the very same object, so they share their
+        subsentences and compare by identity.
+        """
+        raise Exception("nothing to freeze")
+
+    def bitwise(self, columns, mask):
+        """
+        Evaluates this sentence over a block of models at once. columns maps
+        each symbol name to an int whose bit i is its value in model i, and
+        mask has a bit set for every model of the block.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Turns this sentence into a function of a tuple of truth values, one
+        per name in symbols, so that it is evaluated without walking the
+        tree of sentences or looking names up in a model.
+        """
+        index = {name: i for i, name in enumerate(symbols)}
+        try:
+            return eval(f"lambda m: {self.expression(index)}")
+        except (SyntaxError, RecursionError, MemoryError):
+            # too deeply nested for Python's parser, so walk the tree instead
+            symbols = list(symbols)
+            return lambda m: self.evaluate(dict(zip(symbols, m)))
+
     @staticmethod
     def validate(sentence):
         if not isinstance(sentence, Sentence):
@@ -56,12 +113,28 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value == None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
         return {self.name}
 
+    def count_symbols(self, counts):
+        counts[self.name] += 1
+
+    def expression(self, index):
+        return f"m[{index[self.name]}]"
+
+    def freeze(self):
+        return intern(Symbol, (self.name,))
+
+    def bitwise(self, columns, mask):
+        return columns[self.name]
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -80,12 +153,28 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value == None else not value
+
     def formula(self):
         return f"¬{Sentence.parenthesize(self.operand.formula())}"
 
     def symbols(self):
         return self.operand.symbols()
 
+    def count_symbols(self, counts):
+        self.operand.count_symbols(counts)
+
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
+
+    def freeze(self):
+        return intern(Not, (self.operand.freeze(),))
+
+    def bitwise(self, columns, mask):
+        return mask ^ self.operand.bitwise(columns, mask)
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -95,7 +184,9 @@ class And(Sentence):
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        # frozen sentences keep their parts in a tuple
+        return (isinstance(other, And) and
+                tuple(self.conjuncts) == tuple(other.conjuncts))
 
     def __hash__(self):
         return hash(("and", tuple(hash(conj) for conj in self.conjuncts)))
@@ -111,6 +202,17 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conj.evaluate(model) for conj in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conj in self.conjuncts:
+            value = conj.evaluate_partial(model)
+            if value == False:
+                return False
+            elif value == None:
+                result = None
+
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -120,7 +222,38 @@ class And(Sentence):
         )
 
     def symbols(self):
-        return set.union(*(conj.symbols() for conj in self.conjuncts))
+        return set().union(*(conj.symbols() for conj in self.conjuncts))
+
+    def count_symbols(self, counts):
+        for conj in self.conjuncts:
+            conj.count_symbols(counts)
+
+    def expression(self, index):
+        # nested conjunctions, like the ones And(knowledge, fact) builds up,
+        # are joined into one so the expression doesn't nest as deep
+        parts = []
+        stack = list(reversed(self.conjuncts))
+        while stack:
+            conj = stack.pop()
+            if isinstance(conj, And):
+                stack.extend(reversed(conj.conjuncts))
+            else:
+                parts.append(conj.expression(index))
+
+        if len(parts) == 0:
+            return "True"
+
+        return f"({' and '.join(parts)})"
+
+    def freeze(self):
+        return intern(And, tuple(conj.freeze() for conj in self.conjuncts))
+
+    def bitwise(self, columns, mask):
+        bits = mask
+        for conj in self.conjuncts:
+            bits &= conj.bitwise(columns, mask)
+
+        return bits
 
 
 class Or(Sentence):
@@ -131,7 +264,9 @@ class Or(Sentence):
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        # frozen sentences keep their parts in a tuple
+        return (isinstance(other, Or) and
+                tuple(self.disjuncts) == tuple(other.disjuncts))
 
     def __hash__(self):
         return hash(("or", tuple(hash(disj) for disj in self.disjuncts)))
@@ -147,6 +282,17 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disj.evaluate(model) for disj in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disj in self.disjuncts:
+            value = disj.evaluate_partial(model)
+            if value == True:
+                return True
+            elif value == None:
+                result = None
+
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -156,7 +302,37 @@ class Or(Sentence):
         )
 
     def symbols(self):
-        return set.union(*(disj.symbols() for disj in self.disjuncts))
+        return set().union(*(disj.symbols() for disj in self.disjuncts))
+
+    def count_symbols(self, counts):
+        for disj in self.disjuncts:
+            disj.count_symbols(counts)
+
+    def expression(self, index):
+        # nested disjunctions are joined into one, like in And
+        parts = []
+        stack = list(reversed(self.disjuncts))
+        while stack:
+            disj = stack.pop()
+            if isinstance(disj, Or):
+                stack.extend(reversed(disj.disjuncts))
+            else:
+                parts.append(disj.expression(index))
+
+        if len(parts) == 0:
+            return "False"
+
+        return f"({' or '.join(parts)})"
+
+    def freeze(self):
+        return intern(Or, tuple(disj.freeze() for disj in self.disjuncts))
+
+    def bitwise(self, columns, mask):
+        bits = 0
+        for disj in self.disjuncts:
+            bits |= disj.bitwise(columns, mask)
+
+        return bits
 
 
 class Implication(Sentence):
@@ -183,13 +359,44 @@ class Implication(Sentence):
 
         return True
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent == False:
+            return True
+
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent == True:
+            return True
+        elif antecedent == True and consequent == False:
+            return False
+
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return set().union(self.antecedent.symbols(), self.consequent.symbols())
+
+    def count_symbols(self, counts):
+        self.antecedent.count_symbols(counts)
+        self.consequent.count_symbols(counts)
+
+    def expression(self, index):
+        antecedent = self.antecedent.expression(index)
+        consequent = self.consequent.expression(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def freeze(self):
+        return intern(
+            Implication, (self.antecedent.freeze(), self.consequent.freeze())
+        )
+
+    def bitwise(self, columns, mask):
+        antecedent = self.antecedent.bitwise(columns, mask)
+        return (mask ^ antecedent) | self.consequent.bitwise(columns, mask)
 
 
 class Biconditional(Sentence):
@@ -200,7 +407,9 @@ class Biconditional(Sentence):
         self.right = right
 
     def __eq__(self, other):
-        return isinstance(other, Biconditional) and self.left == self.right
+        return (isinstance(other, Biconditional) and
+                self.left == other.left and
+                self.right == other.right)
 
     def __hash__(self):
         return hash(("biconditional", hash(self.left), hash(self.right)))
@@ -222,39 +431,363 @@ class Biconditional(Sentence):
 
         return ltr and rtl
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left == None:
+            return None
+
+        right = self.right.evaluate_partial(model)
+        if right == None:
+            return None
+
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(self.left.formula())
         right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
+    def symbols(self):
+        return set().union(self.left.symbols(), self.right.symbols())
+
+    def count_symbols(self, counts):
+        self.left.count_symbols(counts)
+        self.right.count_symbols(counts)
+
+    def expression(self, index):
+        left = self.left.expression(index)
+        right = self.right.expression(index)
+        return f"({left} == {right})"
+
+    def freeze(self):
+        return intern(Biconditional, (self.left.freeze(), self.right.freeze()))
+
+    def bitwise(self, columns, mask):
+        left = self.left.bitwise(columns, mask)
+        return mask ^ (left ^ self.right.bitwise(columns, mask))
+
+
+class Frozen:
+    """
+    Mixin of the sentences made by freeze(). They can't be changed, so their
+    hash is worked out once when they are interned, and their symbols and
+    formula the first time they are asked for.
+    """
+
+    def __setattr__(self, name, value):
+        raise Exception("frozen sentences can't be changed")
+
+    def __eq__(self, other):
+        # equal frozen sentences are the same object
+        if isinstance(other, Frozen):
+            return self is other
+
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return self.cached_hash
+
+    def __reduce__(self):
+        # unpickling interns the sentence again
+        return (intern, (self.base, self.parts))
+
+    def add(self, sentence):
+        raise Exception("frozen sentences can't be changed, build a new one")
+
+    def freeze(self):
+        return self
+
+    def symbols(self):
+        symbols = vars(self).get("cached_symbols")
+        if symbols == None:
+            symbols = vars(self)["cached_symbols"] = frozenset(super().symbols())
+
+        return symbols
+
+    def formula(self):
+        formula = vars(self).get("cached_formula")
+        if formula == None:
+            formula = vars(self)["cached_formula"] = super().formula()
+
+        return formula
+
+
+class FrozenSymbol(Frozen, Symbol):
+    base = Symbol
+
+
+class FrozenNot(Frozen, Not):
+    base = Not
+
+
+class FrozenAnd(Frozen, And):
+    base = And
+
+
+class FrozenOr(Frozen, Or):
+    base = Or
+
+
+class FrozenImplication(Frozen, Implication):
+    base = Implication
+
+
+class FrozenBiconditional(Frozen, Biconditional):
+    base = Biconditional
+
+
+FROZEN = {frozen.base: frozen for frozen in Frozen.__subclasses__()}
+
+# (class, parts) -> frozen sentence, for as long as the sentence is in use
+interned = weakref.WeakValueDictionary()
+
+
+def intern(cls, parts):
+    """
+    Returns the frozen sentence cls(*parts), where parts are frozen
+    sentences (or the name of a symbol), creating it on first use.
+    """
+
+    key = (cls, parts)
+    sentence = interned.get(key)
+    if sentence != None:
+        return sentence
+
+    sentence = cls(*parts)
+    for name, value in vars(sentence).items():
+        if isinstance(value, list):
+            vars(sentence)[name] = tuple(value)
+
+    # the parts are frozen already, so this doesn't walk the whole tree
+    vars(sentence).update(parts=parts, cached_hash=hash(sentence))
+    sentence.__class__ = FROZEN[cls]
+
+    interned[key] = sentence
+    return sentence
+
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    symbols = sorted(set().union(knowledge.symbols(), query.symbols()))
+
+    # both sentences are compiled once, instead of being walked for every
+    # one of the 2^n models
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        # a model where the knowledge base is true but the query isn't
+        if knowledge(model) and not query(model):
+            return False
+
+    return True
+
+
+def blocks(symbols, block_bits=16):
+    """
+    Yields the models of symbols in blocks of 2^block_bits at a time, as
+    (columns, mask): each symbol is a column of bits with one bit per model
+    of the block, so every connective is a single bitwise operation over the
+    whole block. Bit i of block b is the model where the j-th symbol is bit
+    j of i for the first block_bits symbols, and bit j of b for the rest.
+    """
+
+    low = symbols[:block_bits]  # symbols that change within a block
+    high = symbols[block_bits:]  # symbols that are fixed for a whole block
+
+    size = 1 << len(low)
+    mask = (1 << size) - 1
 
-        # if all symbols in the model are assigned truth values
-        if len(symbols) == 0:
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+    # bit i of the column of the j-th low symbol is bit j of i, which is a
+    # run of 2^j zeros then 2^j ones, repeated over the block
+    patterns = {}
+    for j, name in enumerate(low):
+        period = 1 << (j + 1)
+        run = ((1 << (1 << j)) - 1) << (1 << j)
+        patterns[name] = run * (mask // ((1 << period) - 1))
+
+    for block in range(1 << len(high)):
+        columns = dict(patterns)
+        for j, name in enumerate(high):
+            columns[name] = mask if block >> j & 1 else 0
+
+        yield columns, mask
+
+
+def find_counterexample(knowledge, query, block_bits=16):
+    """
+    Looks for a model where knowledge is true but query is false, and
+    returns it as a dict, or None if knowledge entails query. The models
+    are checked a block at a time, see blocks().
+    """
+
+    symbols = sorted(set().union(knowledge.symbols(), query.symbols()))
+    return check_shard(knowledge, query, symbols, {}, block_bits)
+
+
+def check_shard(knowledge, query, symbols, fixed, block_bits=16, cancel=None):
+    """
+    Looks for a counterexample like find_counterexample(), among the models
+    of symbols extended with the values in fixed. Gives up and returns None
+    once cancel, an optional multiprocessing.Event, is set.
+    """
+
+    low = symbols[:block_bits]
+    high = symbols[block_bits:]
+
+    for block, (columns, mask) in enumerate(blocks(symbols, block_bits)):
+        if cancel != None and cancel.is_set():
+            return None
+
+        for name, value in fixed.items():
+            columns[name] = mask if value else 0
+
+        bad = knowledge.bitwise(columns, mask) & ~query.bitwise(columns, mask)
+        if bad:
+            i = (bad & -bad).bit_length() - 1
+            model = {name: bool(i >> j & 1) for j, name in enumerate(low)}
+            model.update(
+                {name: bool(block >> j & 1) for j, name in enumerate(high)}
+            )
+            model.update(fixed)
+            return model
+
+    return None
+
+
+def parallel_model_check(knowledge, query, shard_bits=None, workers=None,
+                         block_bits=16):
+    """
+    Checks if knowledge base entails query on several processes. The first
+    shard_bits symbols are fixed to each of their 2^shard_bits values, one
+    shard of the models each, and the shards are checked by a pool of
+    workers; the first counterexample found cancels the others. Within a
+    shard the models are checked a block at a time, see blocks().
+    """
+
+    symbols = sorted(set().union(knowledge.symbols(), query.symbols()))
+    if workers == None:
+        workers = os.cpu_count() or 1
+
+    if shard_bits == None:
+        # a few shards per worker, so they all finish at about the same time
+        shard_bits = (4 * workers - 1).bit_length()
+
+    shard_bits = min(shard_bits, len(symbols))
+    sharded = symbols[:shard_bits]
+    rest = symbols[shard_bits:]
+
+    with multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        cancel = manager.Event()
+        futures = []
+        for values in itertools.product((True, False), repeat=len(sharded)):
+            fixed = dict(zip(sharded, values))
+            futures.append(executor.submit(
+                check_shard, knowledge, query, rest, fixed, block_bits, cancel
+            ))
+
+        for future in as_completed(futures):
+            if future.result() != None:
+                cancel.set()
+                for other in futures:
+                    other.cancel()
+
+                return False
+
+    return True
+
+
+def check_queries(knowledge, queries, block_bits=16):
+    """
+    Checks many queries against one knowledge base in a single pass over
+    its models. Returns a list with, for each query, "entailed" if knowledge
+    entails it, "refuted" if knowledge entails its negation, or else
+    "unknown".
+    """
+
+    queries = list(queries)
+    symbols = sorted(
+        set().union(knowledge.symbols(), *(query.symbols() for query in queries))
+    )
+
+    # whether a model of knowledge makes each query true, or false
+    can_be_true = [False] * len(queries)
+    can_be_false = [False] * len(queries)
+    open_queries = list(range(len(queries)))
+
+    for columns, mask in blocks(symbols, block_bits):
+        models = knowledge.bitwise(columns, mask)
+        if not models:
+            continue
+
+        for i in open_queries:
+            bits = queries[i].bitwise(columns, mask)
+            if models & bits:
+                can_be_true[i] = True
+            if models & ~bits:
+                can_be_false[i] = True
+
+        # queries that can go either way won't change anymore
+        open_queries = [
+            i for i in open_queries if not (can_be_true[i] and can_be_false[i])
+        ]
+        if len(open_queries) == 0:
+            break
+
+    results = []
+    for i in range(len(queries)):
+        if not can_be_false[i]:
+            results.append("entailed")
+        elif not can_be_true[i]:
+            results.append("refuted")
+        else:
+            results.append("unknown")
+
+    return results
+
+
+def pruning_model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, assigning one symbol at a time
+    and evaluating both sentences on the partial model: a branch is dropped
+    as soon as knowledge is false or query is true in all of it, and stops
+    the search if knowledge is true but query is false in all of it.
+    """
+
+    # symbols that occur most often settle the sentences soonest
+    counts = collections.Counter()
+    knowledge.count_symbols(counts)
+    query.count_symbols(counts)
+    order = sorted(counts, key=lambda name: (-counts[name], name))
+
+    def check(model, i):
+        if query.evaluate_partial(model) == True:
+            return True
 
+        value = knowledge.evaluate_partial(model)
+        if value == False:
             return True
+        elif value == True and query.evaluate_partial(model) == False:
+            return False
+
+        name = order[i]
+        for value in (True, False):
+            model[name] = value
+            if not check(model, i + 1):
+                return False
 
-        remaining = symbols.copy()
-        sym = remaining.pop()
+        del model[name]
+        return True
 
-        model_true = model.copy()
-        model_true[sym] = True
+    return check(dict(), 0)
 
-        model_false = model.copy()
-        model_false[sym] = False
 
-        return (check_all(knowledge, query, remaining, model_true) and
-                check_all(knowledge, query, remaining, model_false))
+def bitwise_model_check(knowledge, query):
+    """Checks if knowledge base entails query, a block of models at a time."""
 
-    symbols = set.union(knowledge.symbols(), query.symbols())
-    return check_all(knowledge, query, symbols, dict())
+    return find_counterexample(knowledge, query) == None
 
 
 # my not so good implementation of model_check()
@@ -44,6 +44,6 @@ knowledge.add(Not(Symbol("PomonaSlytherin")))
 # Minerva belongs to Gryffindor
 knowledge.add(Symbol("MinervaGryffindor"))
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
+for symbol, answer in zip(symbols, check_queries(knowledge, symbols)):
+    if answer == "entailed":
         print(symbol)
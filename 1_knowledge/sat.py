@@ -0,0 +1,484 @@
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Solver:
+    """
+    CDCL SAT solver. Variables are positive ints and literals are ints whose
+    sign is the polarity, as in the DIMACS format.
+
+    Clauses are watched on their first two literals, conflicts are analysed
+    down to the first unique implication point, the learned clause is kept
+    and the search jumps back to the level where it becomes unit. Variables
+    are picked by activity, which is bumped for every variable that takes
+    part in a conflict.
+
+    The solver is incremental: clauses can be added between calls to solve(),
+    and assumptions only hold for the call they are given to.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.watches = {}  # literal -> clauses watching it
+        self.unsat = False  # an empty clause was derived at level 0
+
+        self.values = {}  # variable -> assigned value
+        self.level = {}  # variable -> decision level of its assignment
+        self.reason = {}  # variable -> clause that implied it, or None
+        self.trail = []  # assigned literals, in order
+        self.trail_lim = []  # trail length at the start of each level
+        self.head = 0  # next trail literal to propagate
+
+        self.activity = {}
+        self.bump = 1.0
+        self.order = []  # heap of (-activity, variable), lazily updated
+        self.phase = {}  # last value of each variable
+
+        self.model = None
+
+    def new_var(self):
+        self.num_vars += 1
+        var = self.num_vars
+        self.activity[var] = 0.0
+        self.phase[var] = False
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.order, (0.0, var))
+        return var
+
+    def value(self, lit):
+        value = self.values.get(abs(lit))
+        if value == None:
+            return None
+
+        return value == (lit > 0)
+
+    def add_clause(self, lits):
+        """Adds a clause, returning False if the clauses became unsatisfiable."""
+
+        self.backtrack(0)
+
+        clause = []
+        for lit in lits:
+            if -lit in clause or self.value(lit) == True:
+                return True  # always satisfied
+
+            if lit not in clause and self.value(lit) != False:
+                clause.append(lit)
+
+        if len(clause) == 0:
+            self.unsat = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() != None:
+                self.unsat = True
+        else:
+            self.attach(clause)
+
+        return not self.unsat
+
+    def attach(self, clause):
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, lit, reason):
+        var = abs(lit)
+        self.values[var] = lit > 0
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """Propagates every unit clause, returning a conflicting clause if any."""
+
+        while self.head < len(self.trail):
+            false_lit = -self.trail[self.head]
+            self.head += 1
+
+            watching = self.watches[false_lit]
+            kept = []
+            for i, clause in enumerate(watching):
+                # keep the literal that just became false in second place
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                if self.value(clause[0]) == True:
+                    kept.append(clause)
+                    continue
+
+                # look for another literal to watch instead
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(clause[0]) == False:
+                        kept.extend(watching[i + 1:])
+                        self.watches[false_lit] = kept
+                        return clause
+
+                    self.enqueue(clause[0], clause)
+
+            self.watches[false_lit] = kept
+
+        return None
+
+    def analyze(self, conflict):
+        """Learns a clause from a conflict; returns it and the level to go to."""
+
+        level = len(self.trail_lim)
+        seen = set()
+        learned = []
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+
+        while True:
+            for q in clause:
+                var = abs(q)
+                if q == lit or var in seen or self.level[var] == 0:
+                    continue
+
+                seen.add(var)
+                self.bump_activity(var)
+                if self.level[var] == level:
+                    counter += 1
+                else:
+                    learned.append(q)
+
+            # the next literal of this level that took part in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+
+            lit = self.trail[index]
+            index -= 1
+            seen.discard(abs(lit))
+            counter -= 1
+            if counter == 0:
+                break
+
+            clause = self.reason[abs(lit)]
+
+        learned.insert(0, -lit)
+
+        # the literal of the highest level goes second, to be watched
+        backjump = 0
+        if len(learned) > 1:
+            i = max(range(1, len(learned)),
+                    key=lambda i: self.level[abs(learned[i])])
+            learned[1], learned[i] = learned[i], learned[1]
+            backjump = self.level[abs(learned[1])]
+
+        return learned, backjump
+
+    def bump_activity(self, var):
+        self.activity[var] += self.bump
+        if self.activity[var] > 1e100:
+            for v in self.activity:
+                self.activity[v] *= 1e-100
+
+            self.bump *= 1e-100
+            self.order = [(-self.activity[v], v) for v in self.activity]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+
+        for lit in self.trail[self.trail_lim[level]:]:
+            var = abs(lit)
+            self.phase[var] = self.values.pop(var)
+            del self.level[var]
+            del self.reason[var]
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+
+    def pick(self):
+        """Returns the unassigned variable with the highest activity, if any."""
+
+        while self.order:
+            activity, var = heapq.heappop(self.order)
+            if var not in self.values and -activity == self.activity[var]:
+                return var
+
+        for var in self.activity:
+            if var not in self.values:
+                return var
+
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True and sets self.model if the clauses are satisfiable with
+        every literal of assumptions true, else returns False.
+        """
+
+        self.model = None
+        self.backtrack(0)
+        if self.unsat or self.propagate() != None:
+            self.unsat = True
+            return False
+
+        while True:
+            conflict = self.propagate()
+            if conflict != None:
+                if len(self.trail_lim) == 0:
+                    self.unsat = True
+                    return False
+
+                learned, backjump = self.analyze(conflict)
+                self.backtrack(backjump)
+                self.bump *= 1 / 0.95
+
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    self.attach(learned)
+                    self.enqueue(learned[0], learned)
+
+                continue
+
+            # assumptions are the first decisions, one level each
+            if len(self.trail_lim) < len(assumptions):
+                lit = assumptions[len(self.trail_lim)]
+                if self.value(lit) == False:
+                    self.backtrack(0)
+                    return False
+
+                self.trail_lim.append(len(self.trail))
+                if self.value(lit) == None:
+                    self.enqueue(lit, None)
+
+                continue
+
+            var = self.pick()
+            if var == None:
+                self.model = dict(self.values)
+                self.backtrack(0)
+                return True
+
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(var if self.phase[var] else -var, None)
+
+
+class Encoder:
+    """
+    Tseitin encoding of sentences into the clauses of a Solver: every
+    connective gets a variable that is made equivalent to it, so the clauses
+    grow linearly with the size of the sentence. Repeated subsentences share
+    their variable.
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.variables = {}  # symbol name -> variable
+        self.literals = {}  # sentence -> literal equivalent to it
+        self.true = None
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_var()
+
+        return self.variables[name]
+
+    def constant(self, value):
+        if self.true == None:
+            self.true = self.solver.new_var()
+            self.solver.add_clause([self.true])
+
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when sentence is."""
+
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, And):
+            if len(sentence.conjuncts) == 0:
+                return self.constant(True)
+
+            parts = [self.literal(conj) for conj in sentence.conjuncts]
+            lit = self.solver.new_var()
+            for part in parts:
+                add([-lit, part])
+
+            add([lit] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            if len(sentence.disjuncts) == 0:
+                return self.constant(False)
+
+            parts = [self.literal(disj) for disj in sentence.disjuncts]
+            lit = self.solver.new_var()
+            for part in parts:
+                add([lit, -part])
+
+            add([-lit] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            lit = self.solver.new_var()
+            add([-lit, -a, b])
+            add([lit, a])
+            add([lit, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            lit = self.solver.new_var()
+            add([-lit, -a, b])
+            add([-lit, a, -b])
+            add([lit, a, b])
+            add([lit, -a, -b])
+        else:
+            raise TypeError("sentence must be a logical sentence")
+
+        self.literals[sentence] = lit
+        return lit
+
+    def clauses(self, sentence):
+        """Splits an asserted sentence into clauses of literals."""
+
+        if isinstance(sentence, And):
+            for conj in sentence.conjuncts:
+                yield from self.clauses(conj)
+        elif isinstance(sentence, Or):
+            yield [self.literal(disj) for disj in sentence.disjuncts]
+        elif isinstance(sentence, Implication):
+            yield [-self.literal(sentence.antecedent),
+                   self.literal(sentence.consequent)]
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, Not):
+            yield from self.clauses(sentence.operand.operand)
+        else:
+            yield [self.literal(sentence)]
+
+    def add(self, sentence, guard=None):
+        """
+        Asserts sentence. With a guard literal, every clause is weakened to
+        guard => clause, so the sentence only holds while guard is assumed.
+        """
+
+        for clause in self.clauses(sentence):
+            if guard != None:
+                clause = [-guard] + clause
+
+            self.solver.add_clause(clause)
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by asking a SAT solver whether
+    knowledge ∧ ¬query is unsatisfiable.
+    """
+
+    solver = Solver()
+    encoder = Encoder(solver)
+    encoder.add(knowledge)
+    encoder.add(Not(query))
+    return not solver.solve()
+
+
+class KnowledgeBase:
+    """
+    Knowledge base that sentences can be told to and retracted from, and
+    asked about, without starting over after every change.
+
+    Each sentence is encoded once, with its clauses guarded by a selector
+    variable, into a solver that is kept with everything it has learned;
+    asking assumes the selectors of the sentences still in the knowledge
+    base. Answers are remembered until a change could make them wrong.
+    """
+
+    def __init__(self, *sentences):
+        self.solver = Solver()
+        self.encoder = Encoder(self.solver)
+        self.selectors = {}  # frozen sentence -> its selector variable
+        self.answers = {}  # frozen query -> whether it is entailed
+
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def __contains__(self, sentence):
+        return sentence.freeze() in self.selectors
+
+    def __len__(self):
+        return len(self.selectors)
+
+    def tell(self, sentence):
+        """Adds sentence to the knowledge base."""
+
+        sentence = sentence.freeze()
+        if sentence in self.selectors:
+            return
+
+        selector = self.solver.new_var()
+        self.encoder.add(sentence, guard=selector)
+        self.selectors[sentence] = selector
+
+        # more knowledge keeps everything that was entailed, but may entail
+        # what wasn't
+        self.answers = {
+            query: entailed for query, entailed in self.answers.items() if entailed
+        }
+
+    def retract(self, sentence):
+        """Removes a sentence that was told to the knowledge base."""
+
+        sentence = sentence.freeze()
+        if sentence not in self.selectors:
+            raise Exception(f"{sentence} is not in the knowledge base")
+
+        # the sentence's clauses are satisfied for good by its selector
+        # being false, and what was learned from them stays true
+        self.solver.add_clause([-self.selectors.pop(sentence)])
+
+        self.answers = {
+            query: entailed
+            for query, entailed in self.answers.items() if not entailed
+        }
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+
+        query = query.freeze()
+        if query not in self.answers:
+            # the literal's definition only names query, it asserts nothing
+            lit = self.encoder.literal(query)
+            assumptions = list(self.selectors.values()) + [-lit]
+            self.answers[query] = not self.solver.solve(assumptions)
+
+        return self.answers[query]
+
+    def check(self, queries):
+        """
+        Like logic.check_queries(): returns "entailed", "refuted" or
+        "unknown" for each query.
+        """
+
+        results = []
+        for query in queries:
+            if self.ask(query):
+                results.append("entailed")
+            elif self.ask(Not(query)):
+                results.append("refuted")
+            else:
+                results.append("unknown")
+
+        return results